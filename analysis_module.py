@@ -1,4 +1,14 @@
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+import indicator_engine
+import streaming_indicators
+
+# Özellik çerçevesi önbelleği: (sembol, veri sürümü) -> indikatörler (bkz. build_feature_frame)
+_FEATURE_CACHE_SIZE = 128
+_feature_cache = OrderedDict()
+_feature_lock = threading.Lock()
 
 def calculate_sma(df, window):
     """Calculates Simple Moving Average."""
@@ -19,16 +29,58 @@ def calculate_rsi(df, window=14):
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
-def calculate_technical_score(df):
+def _data_version(df):
+    """Cheap fingerprint of a price frame: changes whenever a bar is added or the last bar moves."""
+    last = df.iloc[-1]
+    return (len(df), df.index[0], df.index[-1], float(last['Close']), float(last.get('Volume', 0) or 0))
+
+def build_feature_frame(df, symbol=None):
+    """
+    Computes every indicator used by scoring, Kelly sizing and the chart in one pass:
+    Close, SMA50, SMA200, RSI, VolumeAvg20, Volume.
+    With a 'symbol' the result is cached per (symbol, data version), so the score,
+    the signal box and the Plotly traces of one render share a single computation.
+    """
+    if df is None or df.empty or 'Close' not in df.columns:
+        return None
+
+    key = (symbol, _data_version(df)) if symbol else None
+    if key:
+        with _feature_lock:
+            if key in _feature_cache:
+                _feature_cache.move_to_end(key)
+                return _feature_cache[key]
+
+    volume = df['Volume'] if 'Volume' in df.columns else pd.Series(float('nan'), index=df.index)
+    features = pd.DataFrame({
+        'Close': df['Close'],
+        'SMA50': calculate_sma(df, 50),
+        'SMA200': calculate_sma(df, 200),
+        'RSI': calculate_rsi(df),
+        'VolumeAvg20': volume.rolling(window=20).mean(),
+        'Volume': volume
+    }, index=df.index)
+
+    if key:
+        with _feature_lock:
+            _feature_cache[key] = features
+            while len(_feature_cache) > _FEATURE_CACHE_SIZE:
+                _feature_cache.popitem(last=False)
+    return features
+
+def calculate_technical_score(df, features=None):
     """
     Calculates a technical score from 0-100 based on RSI, Trend, and Volume.
+    'features' (build_feature_frame) avoids recomputing the indicators.
     """
     if df is None or df.empty or len(df) < 50:
         return 50
+    if features is None:
+        features = build_feature_frame(df)
+    last = features.iloc[-1]
 
     # 1. RSI Score (30%)
-    rsi_series = calculate_rsi(df)
-    current_rsi = rsi_series.iloc[-1]
+    current_rsi = last['RSI']
     if current_rsi < 30: rsi_score = 90
     elif current_rsi > 70: rsi_score = 10
     else: rsi_score = 100 - abs(current_rsi - 50) * 2 # Peak score at RSI 50 for neutral, or adjust for trend?
@@ -36,9 +88,9 @@ def calculate_technical_score(df):
     rsi_score = max(0, min(100, (100 - current_rsi) if current_rsi > 50 else (current_rsi + 50)))
 
     # 2. Trend Score (40%) - SMA 50 vs 200 and Price
-    sma50 = calculate_sma(df, 50).iloc[-1]
-    sma200 = calculate_sma(df, 200).iloc[-1] if len(df) >= 200 else sma50
-    price = df['Close'].iloc[-1]
+    sma50 = last['SMA50']
+    sma200 = last['SMA200'] if len(df) >= 200 else sma50
+    price = last['Close']
     
     trend_score = 0
     if price > sma50: trend_score += 30
@@ -46,8 +98,8 @@ def calculate_technical_score(df):
     if price > sma200: trend_score += 30
     
     # 3. Volume Score (30%)
-    avg_vol = df['Volume'].rolling(window=20).mean().iloc[-1]
-    curr_vol = df['Volume'].iloc[-1]
+    avg_vol = last['VolumeAvg20']
+    curr_vol = last['Volume']
     vol_ratio = curr_vol / avg_vol if avg_vol > 0 else 1
     vol_score = min(100, vol_ratio * 50) # 2x volume = 100 points
 
@@ -68,26 +120,18 @@ def calculate_kelly_position(score):
     recommended = max(0, (kelly_f / 2))
     return round(min(recommended, 0.25) * 100, 2)
 
-def get_technical_signals(df):
-    """
-    Returns technical signals based on score and indicators.
-    Returns: { 'label': str, 'color': str, 'desc': str, 'rsi': float, 'score': float, 'kelly': float }
-    """
-    score = calculate_technical_score(df)
-    rsi_series = calculate_rsi(df)
-    current_rsi = rsi_series.iloc[-1] if rsi_series is not None and not rsi_series.empty else 0
+# Puan eşikleri: (alt sınır, etiket, renk, açıklama) - yukarıdan aşağı ilk eşleşen
+SIGNAL_LEVELS = [
+    (80, "GÜÇLÜ AL", "#00C853", "Tüm faktörler yükselişi destekliyor."),
+    (60, "AL", "#64DD17", "Pozitif trend ve teknik görünüm."),
+    (40, "NÖTR", "#FFD600", "Belirgin bir trend yönü yok."),
+    (20, "SAT", "#FF6D00", "Negatif teknik baskı."),
+    (float("-inf"), "GÜÇLÜ SAT", "#D50000", "Ağır teknik bozulma.")
+]
+
+def _build_signal(score, current_rsi):
     kelly = calculate_kelly_position(score)
-    
-    if score >= 80:
-        label, color, desc = "GÜÇLÜ AL", "#00C853", "Tüm faktörler yükselişi destekliyor."
-    elif score >= 60:
-        label, color, desc = "AL", "#64DD17", "Pozitif trend ve teknik görünüm."
-    elif score >= 40:
-        label, color, desc = "NÖTR", "#FFD600", "Belirgin bir trend yönü yok."
-    elif score >= 20:
-        label, color, desc = "SAT", "#FF6D00", "Negatif teknik baskı."
-    else:
-        label, color, desc = "GÜÇLÜ SAT", "#D50000", "Ağır teknik bozulma."
+    _, label, color, desc = next(level for level in SIGNAL_LEVELS if score >= level[0])
         
     return {
         "label": label,
@@ -97,3 +141,73 @@ def get_technical_signals(df):
         "score": score,
         "kelly": kelly
     }
+
+def get_technical_signals(df, symbol=None):
+    """
+    Returns technical signals based on score and indicators.
+    Returns: { 'label': str, 'color': str, 'desc': str, 'rsi': float, 'score': float, 'kelly': float }
+    """
+    features = build_feature_frame(df, symbol)
+    score = calculate_technical_score(df, features)
+    current_rsi = features['RSI'].iloc[-1] if features is not None else 0
+    return _build_signal(score, current_rsi)
+
+def get_universe_signals(wide):
+    """
+    Scores a whole universe in one vectorized pass.
+    wide: (field, symbol) OHLCV frame as returned by data_provider.fetch_history.
+    Returns {symbol: signals} with the same dicts as get_technical_signals.
+    """
+    scores = indicator_engine.technical_scores(wide)
+    return {sym: _build_signal(row["score"], row["rsi"]) for sym, row in scores.iterrows()}
+
+def get_stored_signals(symbols):
+    """
+    Scores symbols from their streaming indicator states (streaming_indicators.get_latest)
+    instead of their price history; the values and the score are the same as
+    get_universe_signals on the stored bars. The price store must already be current
+    (see data_provider.refresh_prices).
+    Returns {symbol: signals} like get_universe_signals, plus 'price' and 'date' of the last bar.
+    """
+    latest = streaming_indicators.get_latest(symbols)
+    if not latest:
+        return {}
+    rows = pd.DataFrame.from_dict(latest, orient="index").astype({c: float for c in
+                                  ("close", "rsi", "sma50", "sma200", "volume_mean", "volume")})
+    bars = rows["bars"].to_numpy()
+    sma50 = rows["sma50"].to_numpy()
+    sma200 = np.where(bars >= 200, rows["sma200"].to_numpy(), sma50)
+    scores = indicator_engine.score_from_indicators(
+        rows["close"].to_numpy(), rows["rsi"].to_numpy(), sma50, sma200,
+        rows["volume_mean"].to_numpy(), rows["volume"].to_numpy(), bars
+    )
+    return {sym: {**_build_signal(score, rsi), "price": close, "date": date}
+            for sym, score, rsi, close, date in zip(rows.index, scores, rows["rsi"], rows["close"], rows["date"])}
+
+def calculate_score_series(df, symbol=None):
+    """
+    Technical score for every bar, vectorized: row t equals
+    calculate_technical_score(df.iloc[:t + 1]). Also returns the derived label
+    and Kelly position (%) per bar.
+    Returns a DataFrame indexed like df with 'score', 'label', 'kelly' columns.
+    """
+    features = build_feature_frame(df, symbol)
+    if features is None:
+        return pd.DataFrame(columns=['score', 'label', 'kelly'])
+
+    bars = np.arange(1, len(features) + 1)
+    sma50 = features['SMA50'].to_numpy()
+    sma200 = np.where(bars >= 200, features['SMA200'].to_numpy(), sma50)
+    score = indicator_engine.score_from_indicators(
+        features['Close'].to_numpy(), features['RSI'].to_numpy(), sma50, sma200,
+        features['VolumeAvg20'].to_numpy(), features['Volume'].to_numpy(), bars
+    )
+
+    label = np.select([score >= level[0] for level in SIGNAL_LEVELS], [level[1] for level in SIGNAL_LEVELS], default=SIGNAL_LEVELS[-1][1])
+
+    # calculate_kelly_position'ın vektörel hali: yarım Kelly, en fazla %25
+    b = 1.5
+    kelly_f = (score / 100.0 * (b + 1) - 1) / b
+    kelly = np.round(np.minimum(np.maximum(0, kelly_f / 2), 0.25) * 100, 2)
+
+    return pd.DataFrame({'score': score, 'label': label, 'kelly': kelly}, index=features.index)
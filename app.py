@@ -1,7 +1,5 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import borsapy as bp
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -12,11 +10,19 @@ from fund_module import fetch_tefas_data, get_fund_history
 from calendar_module import fetch_economic_calendar
 from info_module import get_market_summary
 import config
+from data_provider import fetch_history, get_symbol_history, fetch_symbol_history, fetch_concurrently
+from price_archive import get_archive_history
+import fx_service
+import cache_module
+from deadline_module import start_page_budget, run_within_budget
+from symbol_resolver import to_ticker
 from database import init_db
 from rebalance_module import calculate_rebalance, get_rebalance_summary
-from analysis_module import calculate_sma, calculate_rsi, get_technical_signals
+from analysis_module import get_technical_signals, build_feature_frame, calculate_score_series
 from benchmark_module import get_benchmark_data, get_benchmark_summary
 from backtest_module import run_backtest, run_periodic_backtest
+from optimization_module import run_parameter_sweep, run_walk_forward, DEFAULT_GRIDS
+from portfolio_backtest_module import run_portfolio_backtest, get_target_weights, normalize_weights, REBALANCE_FREQUENCIES, REBALANCE_MODES
 from mail_module import send_newsletter, fetch_newsletter_data
 from portfolio_manager import add_transaction, get_all_transactions, get_portfolio_balance, get_portfolio_by_category
 
@@ -105,8 +111,11 @@ def display_technical_analysis(df, symbol):
         st.warning(f"{symbol} için veri bulunamadı.")
         return
 
+    # Tek geçişte hesaplanan indikatörler: sinyal kutusu ve grafik aynı çerçeveyi okur
+    features = build_feature_frame(df, symbol)
+    
     # Signal Box
-    signal = get_technical_signals(df)
+    signal = get_technical_signals(df, symbol=symbol)
     st.markdown(f"""
     <div style="padding:15px; border-radius:12px; background-color:#1E1E1E; border: 2px solid {signal['color']}; color:white; margin-bottom:20px;">
         <div style="display: flex; justify-content: space-between; align-items: center;">
@@ -127,27 +136,28 @@ def display_technical_analysis(df, symbol):
     </div>
     """, unsafe_allow_html=True)
 
-    # SMA Hesaplamaları
-    sma50 = calculate_sma(df, 50)
-    sma200 = calculate_sma(df, 200)
-    rsi = calculate_rsi(df)
-    
     # Subplots
-    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
-                       vertical_spacing=0.1, subplot_titles=(f'Fiyat ve SMA', 'RSI (14)'),
-                       row_heights=[0.7, 0.3])
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, 
+                       vertical_spacing=0.08, subplot_titles=(f'Fiyat ve SMA', 'RSI (14)', 'Teknik Puan Geçmişi'),
+                       row_heights=[0.6, 0.2, 0.2])
     
     # Fiyat Grafiği
     fig.add_trace(go.Scatter(x=df.index, y=df['Close'], name='Fiyat', line=dict(color='white')), row=1, col=1)
-    fig.add_trace(go.Scatter(x=df.index, y=sma50, name='SMA 50', line=dict(color='cyan', width=1.5)), row=1, col=1)
-    fig.add_trace(go.Scatter(x=df.index, y=sma200, name='SMA 200', line=dict(color='red', width=1.5)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=features['SMA50'], name='SMA 50', line=dict(color='cyan', width=1.5)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=features['SMA200'], name='SMA 200', line=dict(color='red', width=1.5)), row=1, col=1)
     
     # RSI Grafiği
-    fig.add_trace(go.Scatter(x=df.index, y=rsi, name='RSI', line=dict(color='purple')), row=2, col=1)
+    fig.add_trace(go.Scatter(x=df.index, y=features['RSI'], name='RSI', line=dict(color='purple')), row=2, col=1)
     fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
     fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
     
-    fig.update_layout(height=500, template="plotly_dark", showlegend=True)
+    # Puan Geçmişi (her bar için, paper bot eşikleriyle)
+    score_history = calculate_score_series(df, symbol)
+    fig.add_trace(go.Scatter(x=score_history.index, y=score_history['score'], name='Teknik Puan', line=dict(color='orange')), row=3, col=1)
+    fig.add_hline(y=80, line_dash="dash", line_color="green", row=3, col=1)
+    fig.add_hline(y=40, line_dash="dash", line_color="red", row=3, col=1)
+    
+    fig.update_layout(height=650, template="plotly_dark", showlegend=True)
     st.plotly_chart(fig, use_container_width=True)
 
 # Sayfa Ayarları
@@ -160,11 +170,7 @@ st.set_page_config(
 # Caching for yfinance to prevent frequent API calls
 @st.cache_data(ttl=900)
 def get_yfinance_data(symbol, period="1y"):
-    try:
-        ticker = yf.Ticker(symbol)
-        return ticker.history(period=period)
-    except:
-        return pd.DataFrame()
+    return fetch_symbol_history(symbol, period=period)
 
 # Helper for price formatting
 def format_price(val, currency="₺"):
@@ -178,6 +184,17 @@ def format_price(val, currency="₺"):
     except (ValueError, TypeError):
         return "---"
 
+# Helper for budget-exceeded data (deadline_module)
+def show_freshness(freshness):
+    if not freshness or not freshness.get('timed_out'):
+        return
+    if freshness['updated_at'] is None:
+        st.caption("⏱️ Veri zamanında alınamadı, arka planda yükleniyor · sayfayı yenileyince gelir.")
+    else:
+        age_min = freshness['age_seconds'] // 60
+        age_note = "az önce" if age_min < 1 else f"{age_min} dk önce"
+        st.caption(f"⏱️ Veri zamanında gelmedi · {age_note} alınan son değer gösteriliyor.")
+
 # Helper for Autocomplete Search Box
 def create_search_box(label, type="general", key=None):
     """
@@ -215,6 +232,9 @@ if st.session_state.get('logged_in'):
 st.sidebar.title("Finans Botu 🤖")
 page = st.sidebar.radio("Menü", ["Piyasa Özeti", "Hisse Tarama", "Fon Analizi", "Portföyüm", "Portföy Dengeleyici", "Strateji Testi", "Raporlar"])
 
+# Sayfa süre bütçesi: geç kalan veriler son başarılı değerden gösterilir (config.PAGE_BUDGETS)
+start_page_budget(page)
+
 st.sidebar.markdown("---")
 
 import pytz # Added for Timezone
@@ -344,11 +364,12 @@ if page == "Piyasa Özeti":
     
     with st.spinner("Piyasa verileri güncelleniyor (Bülten Modu)..."):
         # Reuse newsletter logic
-        raw_data = fetch_newsletter_data()
+        raw_data, market_freshness = run_within_budget("newsletter_data", fetch_newsletter_data, share=0.6)
+    show_freshness(market_freshness)
         
     # Flatten Data for Table
     table_rows = []
-    for cat, assets in raw_data.items():
+    for cat, assets in (raw_data or {}).items():
         for asset in assets:
             # Handle manual/error cases gracefully
             price = asset.get('price', 0)
@@ -403,9 +424,11 @@ if page == "Piyasa Özeti":
     news_targets = ["XU100.IS", "USDTRY=X", "BTC-USD", "GC=F", "AAPL", "NVDA", "THYAO.IS"]
     
     with st.spinner("Haber akışları taranıyor ve analiz ediliyor..."):
+        sentiments, news_freshness = run_within_budget(
+            ("market_news", tuple(news_targets)), fetch_concurrently, get_sentiment_score, news_targets, share=0.4
+        )
         news_items = []
-        for sym in news_targets:
-            s_data = get_sentiment_score(sym)
+        for sym, s_data in zip(news_targets, sentiments or []):
             if s_data and s_data.get('timestamp', 0) > 0 and s_data.get('is_fresh'): # Only fresh news? Or all? User said "En Yeni". Let's include all but prioritizing fresh.
                 # Enrich with symbol name roughly
                 s_data['symbol'] = sym
@@ -417,6 +440,7 @@ if page == "Piyasa Özeti":
         news_items.sort(key=lambda x: (x.get('timestamp', 0), abs(x.get('score', 0))), reverse=True)
         
     # Display News
+    show_freshness(news_freshness)
     if news_items:
         for news in news_items:
             # Color badge
@@ -516,9 +540,10 @@ elif page == "Hisse Tarama":
             st.dataframe(
                 df_etf.style.format({
                     "YTD Getiri (%)": "{:+.2f}%",
+                    "RSI (14)": "{:.1f}",
                     "Masraf (%)": "{:.2f}%",
                     "Fiyat ($)": "${:.2f}"
-                }).bar(subset=["YTD Getiri (%)"], align="mid", color=['#d65f5f', '#5fba7d']),
+                }, na_rep="-").bar(subset=["YTD Getiri (%)"], align="mid", color=['#d65f5f', '#5fba7d']),
                 use_container_width=True
             )
         else:
@@ -532,6 +557,7 @@ elif page == "Fon Analizi":
     # Checkbox for data load (Heavy operation)
     if st.button("🔄 Verileri Güncelle / Yükle"):
         st.cache_data.clear()
+        cache_module.clear()
         
     with st.spinner("TEFAS verileri ve analizler hazırlanıyor (Bu işlem biraz zaman alabilir)..."):
         # Fetching all funds data with calculated metrics
@@ -688,19 +714,48 @@ elif page == "Strateji Testi":
         with col_b1:
             initial_cap = st.number_input("Başlangıç Sermayesi ($/TL)", value=1000, step=100)
         with col_b2:
-            strategy_choice = st.selectbox("Strateji Seçimi", ['RSI Stratejisi (30/70)', 'SMA Cross (50/200)', 'Al ve Tut', 'Smart DCA', 'Normal DCA'])
+            strategy_choice = st.selectbox("Strateji Seçimi", ['RSI Stratejisi (30/70)', 'SMA Cross (50/200)', 'Teknik Puan (80/40)', 'Al ve Tut', 'Smart DCA', 'Normal DCA'])
 
         is_periodic = st.toggle("Dönemsel (Yıllık) Test")
+        is_sweep = strategy_choice in DEFAULT_GRIDS and st.toggle("Parametre Taraması (Optimizasyon)")
+        is_walk_forward = strategy_choice in DEFAULT_GRIDS and st.toggle("Walk-Forward (Örnek Dışı Test)")
     monthly_dca = 0
     if 'DCA' in strategy_choice:
         monthly_dca = st.number_input("Aylık Alım Tutarı", value=100, step=50)
         
     if st.button("Simülasyonu Başlat"):
         with st.spinner(f"{backtest_symbol} için simülasyon çalıştırılıyor..."):
-            df_hist = get_yfinance_data(backtest_symbol, period="5y") # Longer period for periodic tests
+            df_hist = get_archive_history(backtest_symbol, period="5y") # Longer period for periodic tests (mmap arşiv)
             
             if not df_hist.empty:
-                if is_periodic:
+                if (is_sweep or is_walk_forward) and strategy_choice == 'Smart DCA' and monthly_dca <= 0:
+                    st.warning("Smart DCA optimizasyonu için aylık alım tutarı girin (yeni para olmadan tüm parametreler aynı sonucu verir).")
+                elif is_sweep:
+                    sweep_df = run_parameter_sweep(df_hist, strategy_choice, initial_capital=initial_cap, monthly_dca=monthly_dca)
+                    if not sweep_df.empty:
+                        st.subheader(f"🔬 Parametre Taraması ({len(sweep_df)} kombinasyon)")
+                        st.caption("Getiriye göre sıralı. Geçmiş performans gelecekteki sonuçları garanti etmez (aşırı uyum riski).")
+                        st.dataframe(sweep_df.head(25), use_container_width=True)
+                    else:
+                        st.warning("Tarama sonucu bulunamadı.")
+                elif is_walk_forward:
+                    wf = run_walk_forward(df_hist, strategy_choice, initial_capital=initial_cap, monthly_dca=monthly_dca)
+                    if wf:
+                        wf_metrics = wf['metrics']
+                        st.subheader("🚶 Walk-Forward Sonucu (2 yıl optimizasyon → 6 ay işlem)")
+                        w_col1, w_col2, w_col3 = st.columns(3)
+                        w_col1.metric("Örnek Dışı Getiri", f"%{wf_metrics['total_return_pct']}")
+                        w_col2.metric("Son Bakiye", f"{wf_metrics['final_equity']:,}")
+                        w_col3.metric("İşlem Sayısı", wf_metrics['trade_count'])
+                        st.dataframe(wf['windows'], use_container_width=True)
+                        fig_wf = px.line(wf['equity_curve'], y=['Strategy_Equity', 'BuyHold_Equity'],
+                                         labels={"value": "Sermaye Değeri", "index": "Tarih"},
+                                         title=f"{backtest_symbol} Örnek Dışı (Birleştirilmiş) Performans")
+                        fig_wf.update_layout(template="plotly_dark", height=500)
+                        st.plotly_chart(fig_wf, use_container_width=True)
+                    else:
+                        st.warning("Walk-forward için yeterli geçmiş veri yok (en az 2 yıl gerekir).")
+                elif is_periodic:
                     periodic_results = run_periodic_backtest(df_hist, strategy_choice, initial_cap)
                     if periodic_results:
                         st.subheader("🗓️ Yıllık Performans Kıyaslaması")
@@ -748,6 +803,45 @@ elif page == "Strateji Testi":
             else:
                 st.warning(f"{backtest_symbol} için yeterli veri bulunamadı.")
 
+    st.markdown("---")
+    st.subheader("C. Portföy Backtesti (Hedef Dağılım)")
+    target_weights = get_target_weights()
+    # Simülasyon hedefleri 100'e ölçekler: gösterilen yüzdeler kullanılanlarla aynı
+    st.caption("Hedefler: " + ", ".join(f"{sym} %{pct:.1f}" for sym, pct in normalize_weights(target_weights).items()) + " (fiyatlar TL'ye çevrilir)")
+
+    p_col1, p_col2, p_col3 = st.columns(3)
+    with p_col1:
+        pf_capital = st.number_input("Başlangıç Sermayesi (TL)", value=10000, step=1000, key="pf_cap")
+        pf_contribution = st.number_input("Dönem Başına Ek Yatırım (TL)", value=1000, step=500, key="pf_contrib")
+    with p_col2:
+        pf_frequency = st.selectbox("Dengeleme Sıklığı", list(REBALANCE_FREQUENCIES), key="pf_freq")
+    with p_col3:
+        pf_mode = st.selectbox("Dengeleme Yöntemi", REBALANCE_MODES,
+                               format_func=lambda m: {"new_money": "Sadece Yeni Para", "full": "Tam (Satışlı)", "none": "Dengelemesiz"}[m],
+                               key="pf_mode")
+
+    if st.button("Portföy Simülasyonunu Başlat"):
+        with st.spinner("Portföy simülasyonu çalıştırılıyor..."):
+            pf_result = run_portfolio_backtest(target_weights, REBALANCE_FREQUENCIES[pf_frequency], "5y", pf_capital, pf_contribution, pf_mode)
+        if pf_result:
+            pf_metrics = pf_result['metrics']
+            pm_col1, pm_col2, pm_col3 = st.columns(3)
+            pm_col1.metric("Toplam Getiri", f"%{pf_metrics['total_return_pct']}",
+                           delta=f"{round(pf_metrics['total_return_pct'] - pf_metrics['benchmark_return_pct'], 2)}% (dengelemesize göre)")
+            pm_col2.metric("Son Bakiye", f"{pf_metrics['final_equity']:,} ₺")
+            pm_col3.metric("Yatırılan Toplam", f"{pf_metrics['total_invested']:,} ₺")
+
+            fig_pf = px.line(pf_result['equity_curve'], y=['Strategy_Equity', 'BuyHold_Equity'],
+                             labels={"value": "Portföy Değeri (TL)", "index": "Tarih"}, title="Portföy Performansı")
+            fig_pf.update_layout(template="plotly_dark", height=450)
+            st.plotly_chart(fig_pf, use_container_width=True)
+
+            fig_w = px.area(pf_result['weights'], labels={"value": "Ağırlık (%)", "index": "Tarih"}, title="Varlık Ağırlıkları")
+            fig_w.update_layout(template="plotly_dark", height=350)
+            st.plotly_chart(fig_w, use_container_width=True)
+        else:
+            st.warning("Portföy sembolleri için fiyat verisi bulunamadı.")
+
 # --- 6. CÜZDANIM (PORTFOLIO) ---
 # --- 6. CÜZDANIM (PORTFOLIO PRO) ---
 elif page == "Portföyüm":
@@ -761,25 +855,24 @@ elif page == "Portföyüm":
     
         # Fetch Data
         with st.spinner("Portföy verileri hazırlanıyor..."):
-            holdings = get_portfolio_balance(user_email)
+            holdings, holdings_freshness = run_within_budget(("portfolio_balance", user_email), get_portfolio_balance, user_email, share=0.5)
+            holdings = holdings or []
             
             # Calculate Total Values
             total_tl = sum([h['total_value_tl'] for h in holdings]) if holdings else 0
             
-            # USD Conversion (Simple)
-            usd_rate = 35.0
-            try:
-                # Assuming market_data might be available globally or re-fetch
-                usd_curr = yf.Ticker("TRY=X").history(period="1d")
-                if not usd_curr.empty:
-                    usd_rate = usd_curr['Close'].iloc[-1]
-            except:
-                pass
+            # USD Conversion (ortak kur servisi)
+            usd_rate = fx_service.get_rate("USD")
             total_usd = total_tl / usd_rate
             
             # Historical Data for Chart
             from portfolio_manager import get_benchmark_data, get_portfolio_history
-            port_history = get_portfolio_history(holdings, period="1y") if holdings else None
+            port_history, history_freshness = None, None
+            if holdings:
+                port_history, history_freshness = run_within_budget(
+                    ("portfolio_history", user_email), get_portfolio_history, holdings, period="1y", share=0.3
+                )
+        show_freshness(holdings_freshness)
             
         # --- KATMAN 1: Özet ve Görselleştirme ---
         
@@ -811,6 +904,7 @@ elif page == "Portföyüm":
                 fig_l = px.area(port_history, title="Portföy Değişim Grafiği (TL)", labels={"value": "Değer", "index": "Tarih"})
                 fig_l.update_layout(template="plotly_dark", height=300, showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
                 st.plotly_chart(fig_l, use_container_width=True)
+                show_freshness(history_freshness)
             else:
                 st.info("Grafik için yeterli veri yok.")
                 
@@ -883,9 +977,13 @@ elif page == "Portföyüm":
             if port_history is not None:
     
                 with st.spinner("Benchmark verileri çekiliyor..."):
-                    bench_df = get_benchmark_data(period="1y", custom_ticker=custom_comp if custom_comp else None)
+                    custom_ticker = custom_comp if custom_comp else None
+                    bench_df, bench_freshness = run_within_budget(
+                        ("benchmark", custom_ticker), get_benchmark_data, period="1y", custom_ticker=custom_ticker, share=0.2
+                    )
+                show_freshness(bench_freshness)
                     
-                if not bench_df.empty:
+                if bench_df is not None and not bench_df.empty:
                     # Merge Portfolio History
                     # Normalize all to start at 0%
                     
@@ -977,10 +1075,11 @@ elif page == "Portföyüm":
     open_pos = paper_trader.get_open_paper_positions()
     if open_pos:
         pos_list = []
+        yf_map = {sym: to_ticker(sym, market="BIST") for sym in open_pos}
+        pos_prices = fetch_history(list(yf_map.values()), period="5d")
         for sym, qty in open_pos.items():
             try:
-                yf_sym = sym if "." in sym or "-" in sym else sym + ".IS"
-                curr_price = yf.Ticker(yf_sym).history(period="1d")['Close'].iloc[-1]
+                curr_price = get_symbol_history(pos_prices, yf_map[sym])['Close'].iloc[-1]
                 pos_list.append({"Sembol": sym, "Adet": round(qty, 2), "Güncel Fiyat": round(curr_price, 2)})
             except:
                 pos_list.append({"Sembol": sym, "Adet": round(qty, 2), "Güncel Fiyat": "---"})
@@ -1037,7 +1136,17 @@ elif page == "Bilgi Notu":
     cal_filter = st.selectbox("Takvim Filtresi", ["Türkiye (TR)", "ABD (US)", "Global (All)"])
     filter_map = {"Türkiye (TR)": "TR", "ABD (US)": "US", "Global (All)": "ALL"}
     
-    data = get_market_summary(calendar_country=filter_map[cal_filter])
+    data, freshness = get_market_summary.with_meta(calendar_country=filter_map[cal_filter])
+    
+    age_min = freshness['age_seconds'] // 60
+    age_note = "az önce" if age_min < 1 else f"{age_min} dk önce"
+    if data is None:
+        st.warning("Piyasa verileri şu an alınamıyor, lütfen daha sonra tekrar deneyin.")
+        data = {"usd": None, "eur": None, "bond_2y": None, "bond_10y": None, "calendar": None}
+    elif freshness['is_stale']:
+        st.caption(f"🕒 Veriler {age_note} güncellendi · arka planda yenileniyor, sayfayı yenileyince güncel hali gelir.")
+    else:
+        st.caption(f"🕒 Veriler {age_note} güncellendi ({freshness['updated_at'].strftime('%H:%M')}).")
     
     st.subheader("Tahvil Piyasası")
     b_col1, b_col2 = st.columns(2)
@@ -1,76 +1,126 @@
 import pandas as pd
 import numpy as np
-from analysis_module import calculate_sma, calculate_rsi
+from analysis_module import build_feature_frame, calculate_score_series
 
-from strategies import get_smart_dca_multiplier
+from strategies import get_smart_dca_multipliers
 
-def run_backtest(df, strategy_name, initial_capital=1000, monthly_dca=0):
+COMMISSION_RATE = 0.002 # %0.2
+
+def holding_state(buy, sell, initial=False):
     """
-    Simulates a trading strategy on historical data.
-    Supports Lump Sum or DCA.
+    Position state (True = invested) after each bar for 'buy when flat, sell when
+    holding' rules: the last buy/sell signal seen decides the state.
+    initial: state before the first bar (e.g. carried over from a previous window).
     """
-    if df is None or df.empty:
-        return None
-    
-    data = df.copy()
-    commission_rate = 0.002 # %0.2
-    
-    # Calculate Indicators
-    data['SMA200'] = calculate_sma(data, 200)
-    data['RSI'] = calculate_rsi(data)
-    
-    # Simulation variables
-    cash = initial_capital
-    position = 0 # Units held
-    equity_curve = []
-    trade_count = 0
+    signal = np.where(buy, 1.0, np.where(sell, 0.0, np.nan))
+    return pd.Series(signal).ffill().fillna(float(initial)).to_numpy().astype(bool)
+
+def crossovers(fast, slow):
+    """
+    (golden cross, death cross) boolean arrays: bars where 'fast' is above / below 'slow'
+    but was not on the previous bar. A cross through equality still signals, and the
+    first bar where both averages are defined signals the side 'fast' is already on.
+    Bars where either average is still undefined never signal.
+    """
+    above = fast > slow
+    below = fast < slow
+    prev_above = np.r_[False, above[:-1]]
+    prev_below = np.r_[False, below[:-1]]
+    return above & ~prev_above, below & ~prev_below
+
+def lump_sum_equity(price, holding, capital, commission_rate, units=0.0):
+    """
+    All-in / all-out equity curve for a holding state array.
+    units: position already held before the first bar (a continuing run; 'capital'
+    is then the cash next to it). It is only sold, with commission, on a real exit.
+    Returns (equity array, trade count). Units are carried per trade, not per bar,
+    so only the (few) trades are iterated; every bar is filled with array indexing.
+    """
+    invested = units > 0
+    change = np.diff(holding.astype(np.int8), prepend=np.int8(invested))
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+
+    # Index 0 = before the first buy (or the carried position); index k + 1 = trade k
+    held = np.zeros(len(entries) + 1)
+    held[0] = units
+    cash_after = np.full(len(entries) + 1, float(capital)) # satıştan sonraki nakit (açık pozisyonda 0)
+    cash = capital
+    if invested:
+        # Devreden pozisyon ilk çıkışta kapanır
+        cash = units * price[exits[0]] * (1 - commission_rate) if len(exits) else 0
+        cash_after[0] = cash
+    for k, entry in enumerate(entries):
+        held[k + 1] = cash / (price[entry] * (1 + commission_rate))
+        exit_k = k + invested
+        cash = held[k + 1] * price[exits[exit_k]] * (1 - commission_rate) if exit_k < len(exits) else 0
+        cash_after[k + 1] = cash
+
+    trade = np.cumsum(change == 1) # her barın ait olduğu işlem
+    equity = np.where(holding, held[trade] * price, cash_after[trade])
+    return equity, len(entries) + len(exits)
+
+def dca_equity(month, price, multiplier, capital, monthly_dca, commission_rate, prev_month=None, units=0.0):
+    """
+    Monthly DCA (first trading day of each month, everything in cash is invested).
+    month: month number per bar, multiplier: DCA multiplier per bar.
+    prev_month / units: month of the bar before the first one and the position already
+    held when continuing a run (e.g. a walk-forward window). Cash in 'capital' is
+    invested on the first bar, but the monthly amount is only added there if the
+    month really changes.
+    Returns (equity array, total invested, trade count).
+    """
+    new_month = np.r_[prev_month is None or month[0] != prev_month, month[1:] != month[:-1]]
+    buy = new_month.copy()
+    buy[0] = new_month[0] or capital > 0
+
+    added = np.where(new_month, monthly_dca * multiplier, 0.0)
+    deposit = added.copy()
+    deposit[0] = capital + added[0]
+    position = units + np.cumsum(np.where(buy, deposit / (price * (1 + commission_rate)), 0.0))
+
+    total_invested = np.cumsum(np.r_[capital, added[new_month]])[-1]
+    return position * price, total_invested, int(buy.sum())
+
+def add_indicators(data, strategy_name):
+    """Adds the indicator columns the strategies read (SMA50, SMA200, RSI and, if needed, Score) to 'data'."""
+    # Paylaşılan özellik çerçevesi: SMA50, SMA200, RSI tek geçişte
+    features = build_feature_frame(data)
+    data['SMA50'] = features['SMA50']
+    data['SMA200'] = features['SMA200']
+    data['RSI'] = features['RSI']
+    if strategy_name == 'Teknik Puan (80/40)':
+        # Her bar için puan tek vektörel geçişte (paper bot kuralı: >80 al, <40 sat)
+        data['Score'] = calculate_score_series(data)['score']
+    return data
+
+def _simulate(data, strategy_name, initial_capital, monthly_dca):
+    """Backtest on a frame that already has its indicator columns (see add_indicators)."""
+    commission_rate = COMMISSION_RATE
+    price = data['Close'].to_numpy(dtype=float)
     total_invested = initial_capital
-    
-    last_month = -1
-    
-    for i in range(len(data)):
-        price = data['Close'].iloc[i]
-        date = data.index[i]
-        
-        # DCA Logic (First trading day of month)
-        if monthly_dca > 0 and date.month != last_month:
-            multiplier = 1.0
-            if strategy_name == 'Smart DCA':
-                multiplier = get_smart_dca_multiplier(data.iloc[i])
-            
-            added_cash = monthly_dca * multiplier
-            cash += added_cash
-            total_invested += added_cash
-            last_month = date.month
-            
-            # Auto-buy for DCA (Monthly Buy)
-            units_to_buy = cash / (price * (1 + commission_rate))
-            position += units_to_buy
-            cash = 0
-            trade_count += 1
+    trade_count = 0
 
+    if monthly_dca > 0:
+        multiplier = get_smart_dca_multipliers(data) if strategy_name == 'Smart DCA' else np.ones(len(data))
+        equity_curve, total_invested, trade_count = dca_equity(data.index.month.to_numpy(), price, multiplier, initial_capital, monthly_dca, commission_rate)
+    elif monthly_dca == 0:
         # Logic for Lump Sum Strategies
-        if monthly_dca == 0:
-            if strategy_name == 'RSI Stratejisi (30/70)':
-                rsi_val = data['RSI'].iloc[i]
-                if rsi_val < 30 and position == 0 and not np.isnan(rsi_val):
-                    units_to_buy = cash / (price * (1 + commission_rate))
-                    position = units_to_buy
-                    cash = 0
-                    trade_count += 1
-                elif rsi_val > 70 and position > 0 and not np.isnan(rsi_val):
-                    cash = position * price * (1 - commission_rate)
-                    position = 0
-                    trade_count += 1
-            elif strategy_name == 'Al ve Tut' and i == 0:
-                units_to_buy = cash / (price * (1 + commission_rate))
-                position = units_to_buy
-                cash = 0
-                trade_count = 1
-        
-        # Track total equity value
-        current_equity = cash + (position * price)
-        equity_curve.append(current_equity)
+        if strategy_name == 'RSI Stratejisi (30/70)':
+            rsi_val = data['RSI'].to_numpy()
+            holding = holding_state(rsi_val < 30, rsi_val > 70)
+        elif strategy_name == 'Teknik Puan (80/40)':
+            score_val = data['Score'].to_numpy()
+            holding = holding_state(score_val > 80, score_val < 40)
+        elif strategy_name == 'SMA Cross (50/200)':
+            holding = holding_state(*crossovers(data['SMA50'].to_numpy(), data['SMA200'].to_numpy()))
+        elif strategy_name == 'Al ve Tut':
+            holding = np.ones(len(data), dtype=bool)
+        else:
+            holding = np.zeros(len(data), dtype=bool)
+        equity_curve, trade_count = lump_sum_equity(price, holding, initial_capital, commission_rate)
+    else:
+        equity_curve = np.full(len(data), float(initial_capital))
     
     final_equity = equity_curve[-1]
     total_return_pct = ((final_equity / total_invested) - 1) * 100
@@ -97,23 +147,43 @@ def run_backtest(df, strategy_name, initial_capital=1000, monthly_dca=0):
         "equity_curve": result_df
     }
 
+def run_backtest(df, strategy_name, initial_capital=1000, monthly_dca=0):
+    """
+    Simulates a trading strategy on historical data.
+    Supports Lump Sum or DCA.
+    Positions come from signal arrays and the equity curve is built with NumPy
+    cumulative operations (no per-row loop).
+    """
+    if df is None or df.empty:
+        return None
+    
+    data = add_indicators(df.copy(), strategy_name)
+    return _simulate(data, strategy_name, initial_capital, monthly_dca)
+
 def run_periodic_backtest(df, strategy_name, initial_capital):
     """
     Splits data by year and runs backtest for each segment.
+    Indicators are computed once over the full history, so every year starts with
+    its SMA200 / RSI warm-up and matches the full-period run; each year still starts
+    flat with 'initial_capital'.
+    Note: the warm-up uses bars from before the year. Earlier versions recomputed the
+    indicators inside each year, leaving its first weeks without (or with partial)
+    SMA / RSI values, so early-year signals and yearly returns differ from those results.
     """
     if df is None or df.empty:
         return []
         
-    years = df.index.year.unique()
+    data = add_indicators(df.copy(), strategy_name)
+    years = data.index.year.to_numpy()
+    # Yıllar sıralı ardışık bloklar: sınırlar tek geçişte bulunur, kopya yerine iloc dilimi
+    bounds = np.flatnonzero(np.r_[True, years[1:] != years[:-1], True])
     results = []
     
-    for year in years:
-        year_data = df[df.index.year == year]
-        if len(year_data) < 20: continue # Skip if very few days
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end - start < 20: continue # Skip if very few days
         
-        res = run_backtest(year_data, strategy_name, initial_capital)
-        if res:
-            res['metrics']['year'] = year
-            results.append(res)
+        res = _simulate(data.iloc[start:end], strategy_name, initial_capital, 0)
+        res['metrics']['year'] = int(years[start])
+        results.append(res)
             
     return results
@@ -1,9 +1,11 @@
-import yfinance as yf
 import pandas as pd
 import streamlit as st
 import numpy as np
+from data_provider import fetch_history, get_symbol_history
+from cache_module import disk_cached
 
 @st.cache_data(ttl=3600)
+@disk_cached(ttl=3600)
 def get_benchmark_data():
     """
     Fetches 1 year of historical data for USD, Gold, and BIST30.
@@ -24,19 +26,16 @@ def get_benchmark_data():
     
     found_any = False
     
-    # Adım 2 (Bağımsız İndirme)
+    # Adım 2 (Toplu İndirme): Tek istekte tüm semboller, sonra bağımsız işleme
+    prices = fetch_history(list(symbols.values()), period="1y")
+    
     for label, sym in symbols.items():
         try:
-            ticker = yf.Ticker(sym)
-            # Fetch data (ensure we get enough history)
-            data = ticker.history(period="1y")['Close']
+            hist = get_symbol_history(prices, sym)
+            data = hist['Close'] if not hist.empty else pd.Series(dtype=float)
             
             if not data.empty:
                 # Adım 3 (Akıllı Birleştirme)
-                # Remove timezone if exists
-                if data.index.tz is not None:
-                    data.index = data.index.tz_localize(None)
-                
                 # Normalize data index to midnight to match master_index
                 data.index = data.index.normalize()
                 
@@ -0,0 +1,262 @@
+import os
+import time
+import pickle
+import hashlib
+import functools
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+import config
+
+try:
+    import fcntl
+except ImportError: # Windows: kilitsiz çalışır, yazımlar yine atomiktir
+    fcntl = None
+
+# --- SÜREÇLER ARASI DİSK ÖNBELLEĞİ ---
+# Streamlit uygulaması ve run_scheduler.py (GitHub Actions) aynı dizini okur/yazar,
+# böylece biri veriyi ısıttığında diğeri soğuk başlamaz.
+# Dosya: <anahtar-hash>.pkl -> pickle(meta) + pickle(value), meta = {"key", "created", "expires"}
+# Meta ayrı yazıldığı için tahliye sırasında değerin tamamı okunmaz.
+
+_last_evict = 0.0
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+def _path(key_hash, ext):
+    return os.path.join(config.DISK_CACHE_DIR, f"{key_hash}.{ext}")
+
+def _hash_key(key):
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+@contextmanager
+def _locked(key_hash):
+    """Exclusive cross-process lock for one cache key."""
+    os.makedirs(config.DISK_CACHE_DIR, exist_ok=True)
+    with open(_path(key_hash, "lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read(key_hash, meta_only=False):
+    """Returns (meta, value) or (None, None) if missing/corrupt."""
+    try:
+        with open(_path(key_hash, "pkl"), "rb") as f:
+            meta = pickle.load(f)
+            return meta, None if meta_only else pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None, None
+
+def cache_get(key, allow_stale=False):
+    """
+    Returns the cached value for 'key', or None if missing or expired.
+    With allow_stale=True an expired value is returned as well.
+    """
+    meta, value = _read(_hash_key(key))
+    if meta is None:
+        return None
+    if not allow_stale and meta["expires"] < time.time():
+        return None
+    try:
+        os.utime(_path(_hash_key(key), "pkl")) # LRU tahliyesi için son erişim
+    except OSError:
+        pass
+    return value
+
+def cache_get_meta(key):
+    """Returns {'key', 'created', 'expires'} for a cached entry, or None."""
+    meta, _ = _read(_hash_key(key), meta_only=True)
+    return meta
+
+def cache_set(key, value, ttl):
+    """Stores 'value' for 'ttl' seconds (atomic write) and evicts if the cache is too large."""
+    key_hash = _hash_key(key)
+    os.makedirs(config.DISK_CACHE_DIR, exist_ok=True)
+    now = time.time()
+    meta = {"key": repr(key), "created": now, "expires": now + ttl}
+
+    tmp_path = f"{_path(key_hash, 'pkl')}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _path(key_hash, "pkl"))
+    except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+        print(f"Disk cache write error ({key}): {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    evict()
+
+def cache_get_or_set(key, compute, ttl):
+    """
+    Returns the cached value or computes, stores and returns it.
+    Holds the key's file lock while computing so the app and the scheduler
+    never fetch the same data at the same time.
+    """
+    value = cache_get(key)
+    if value is not None:
+        return value
+
+    key_hash = _hash_key(key)
+    with _locked(key_hash):
+        value = cache_get(key) # Diğer süreç biz beklerken doldurmuş olabilir
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None:
+            cache_set(key, value, ttl)
+    return value
+
+def evict(force=False):
+    """
+    Removes expired entries, then the least recently used ones until the
+    cache fits in config.DISK_CACHE_MAX_MB. Runs at most once a minute per process.
+    """
+    global _last_evict
+    if not os.path.isdir(config.DISK_CACHE_DIR):
+        return
+    if not force and time.time() - _last_evict < 60:
+        return
+    _last_evict = time.time()
+    now = time.time()
+    entries = []
+    for name in os.listdir(config.DISK_CACHE_DIR):
+        if not name.endswith(".pkl"):
+            continue
+        path = os.path.join(config.DISK_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append([path, stat.st_size, stat.st_mtime])
+
+    # 1. Süresi geçenler (DISK_CACHE_STALE_GRACE boyunca bayat okuma için tutulur)
+    keep = []
+    for entry in entries:
+        meta, _ = _read(os.path.basename(entry[0])[:-4], meta_only=True)
+        if meta is None or meta["expires"] + config.DISK_CACHE_STALE_GRACE < now:
+            _remove(entry[0])
+        else:
+            keep.append(entry)
+
+    # 2. Boyut sınırı: en eski erişilenden başla
+    limit = config.DISK_CACHE_MAX_MB * 1024 * 1024
+    total = sum(e[1] for e in keep)
+    for path, size, _ in sorted(keep, key=lambda e: e[2]):
+        if total <= limit:
+            break
+        _remove(path)
+        total -= size
+
+def _remove(pkl_path):
+    for path in (pkl_path, pkl_path[:-4] + ".lock"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def clear():
+    """Deletes every cache entry."""
+    if not os.path.isdir(config.DISK_CACHE_DIR):
+        return
+    for name in os.listdir(config.DISK_CACHE_DIR):
+        if name.endswith(".pkl"):
+            _remove(os.path.join(config.DISK_CACHE_DIR, name))
+
+def is_empty(value):
+    if value is None:
+        return True
+    if isinstance(value, (dict, list, tuple)):
+        return len(value) == 0
+    return bool(getattr(value, "empty", False))
+
+def _func_key(func, args, kwargs):
+    return (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+
+def disk_cached(ttl):
+    """
+    Decorator: caches a function's return value on disk for 'ttl' seconds,
+    keyed by module, function name and arguments. Empty results are returned
+    but not stored, so a failed fetch is retried on the next call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _func_key(func, args, kwargs)
+            computed = {}
+
+            def compute():
+                computed["value"] = func(*args, **kwargs)
+                return None if is_empty(computed["value"]) else computed["value"]
+
+            value = cache_get_or_set(key, compute, ttl)
+            return value if value is not None else computed.get("value")
+        return wrapper
+    return decorator
+
+def _refresh_in_background(key, compute, ttl):
+    """Recomputes 'key' on a daemon thread; only one refresh per key runs at a time."""
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            value = compute()
+            if not is_empty(value):
+                cache_set(key, value, ttl)
+        except Exception as e:
+            print(f"Background refresh error ({key}): {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+def _freshness(key, meta):
+    now = time.time()
+    return {
+        "updated_at": datetime.fromtimestamp(meta["created"]),
+        "age_seconds": int(now - meta["created"]),
+        "is_stale": meta["expires"] < now,
+        "refreshing": key in _refreshing
+    }
+
+def swr_cached(ttl):
+    """
+    Stale-while-revalidate decorator backed by the disk cache.
+    Once a value exists it is always returned immediately; if it is older than
+    'ttl' seconds a background thread refreshes it for the next caller.
+    Only the very first call (nothing cached yet) blocks.
+    The wrapped function gets a .with_meta(*args, **kwargs) variant returning
+    (value, {'updated_at', 'age_seconds', 'is_stale', 'refreshing'}).
+    """
+    def decorator(func):
+        def with_meta(*args, **kwargs):
+            key = _func_key(func, args, kwargs)
+            meta, value = _read(_hash_key(key))
+
+            if meta is None:
+                value = func(*args, **kwargs)
+                if not is_empty(value):
+                    cache_set(key, value, ttl)
+                now = time.time()
+                return value, _freshness(key, {"created": now, "expires": now + ttl})
+
+            if meta["expires"] < time.time():
+                _refresh_in_background(key, lambda: func(*args, **kwargs), ttl)
+            return value, _freshness(key, meta)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return with_meta(*args, **kwargs)[0]
+
+        wrapper.with_meta = with_meta
+        return wrapper
+    return decorator
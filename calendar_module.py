@@ -3,8 +3,12 @@ import pandas as pd
 from datetime import datetime
 from bs4 import BeautifulSoup
 import streamlit as st
+from cache_module import disk_cached
+from provider_module import provider_call
+from deadline_module import cap_timeout
 
 @st.cache_data(ttl=3600)
+@disk_cached(ttl=3600)
 def fetch_economic_calendar():
     """
     Fetches today's economic calendar from Investing.com (TR) or TradingEconomics.
@@ -25,7 +29,7 @@ def fetch_economic_calendar():
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=5)
+        response = provider_call("investing.com", ("get", url), lambda: requests.get(url, headers=headers, timeout=cap_timeout(5)))
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, 'html.parser')
             # Parsing Investing.com table is complex and changes often.
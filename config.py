@@ -50,9 +50,82 @@ PORTFOLIO_TARGETS = {
     "Sasa": "SASA.IS"
 }
 
+# Portföy backtesti: hedef kategorilerin temsilci sembolleri (fiyatları TL'ye çevrilir)
+PORTFOLIO_BACKTEST_SYMBOLS = {
+    "Teknoloji": "QQQ",
+    "Yerli Hisse": "XU100.IS",
+    "Eurobond": "EMB"
+}
+
 ANNUAL_INFLATION_RATE = 45 # %45
 RISK_FREE_RATE = 0.40 # %40 (Mevduat/Tahvil tahmini)
 
+# Yerel Fiyat Deposu: Bu süre içinde güncellenen semboller için ağa hiç çıkılmaz (dakika)
+PRICE_STORE_REFRESH_MINUTES = 15
+
+# Backtest/tarama için bellek eşlemeli sütunsal arşiv dizini
+PRICE_ARCHIVE_DIR = "data/archive"
+
+# Eşzamanlı veri çekme (tarama): en fazla iş parçacığı ve sembol başına zaman aşımı (sn)
+FETCH_MAX_WORKERS = 8
+FETCH_TIMEOUT = 10
+FETCH_BATCH_TIMEOUT = 60 # Bir taramanın (tüm semboller) toplam üst süresi (sn)
+
+# Aynı veriyi çeken eşzamanlı isteklerin, süren isteği en fazla bekleme süresi (sn)
+SINGLE_FLIGHT_WAIT = 60
+
+# Süreçler arası disk önbelleği (Streamlit + run_scheduler.py ortak)
+DISK_CACHE_DIR = "data/cache"
+DISK_CACHE_MAX_MB = 200
+DISK_CACHE_STALE_GRACE = 86400 # Süresi geçen kayıt silinmeden önce bu kadar (sn) bayat okunabilir
+
+# Record/Replay: kaydedilen kaynak cevaplarının dizini (bkz. provider_module, perf_bench.py)
+PROVIDER_FIXTURE_DIR = "fixtures"
+
+# Dış kaynak erişim kuralları (provider_module)
+# Kaynak başına token kovası: (saniyede istek, anlık patlama kapasitesi)
+UPSTREAM_RATE_LIMITS = {
+    "yahoo": (4, 8),
+    "borsapy": (5, 10),
+    "etf.com": (1, 2),
+    "investing.com": (1, 2),
+    "github": (5, 5)
+}
+UPSTREAM_DEFAULT_RATE_LIMIT = (5, 10)
+UPSTREAM_MAX_RETRIES = 3 # Geçici hatalarda (ağ, 429, 5xx) tekrar deneme sayısı
+UPSTREAM_BACKOFF_BASE = 0.5 # Üstel bekleme tabanı (sn), tam jitter ile
+UPSTREAM_BACKOFF_MAX = 8
+CIRCUIT_FAILURE_THRESHOLD = 5 # Art arda bu kadar geçici hata -> devre açılır
+CIRCUIT_COOLDOWN_SECONDS = 60 # Açık devre bu süre boyunca isteği hiç göndermeden reddeder
+
+# Yahoo / borsapy yönlendirmesi (routing_module)
+ROUTING_EWMA_ALPHA = 0.3 # Gecikme ve hata oranı ortalamasında son ölçümün ağırlığı
+ROUTING_ERROR_PENALTY = 10 # Hata oranı başına eklenen ceza (sn): %50 hata = +5 sn
+ROUTING_ERROR_HALF_LIFE = 600 # Hata cezası yeni ölçüm gelmezse bu sürede yarıya iner (sn): geri düşen kaynak tekrar denenir
+ROUTING_UNKNOWN_ERROR_RATE = 0.5 # Hiç ölçülmemiş kaynak için varsayılan hata oranı (sıfır sayılsa sağlıklı kaynağı geçerdi)
+ROUTING_HEDGE = True # Yavaş isteği ikinci kaynağa da gönder, ilk gelen kazanır
+ROUTING_HEDGE_AFTER = 2.0 # İkinci kaynağı ateşlemeden önce beklenen süre (sn)
+
+# Sayfa başına toplam süre bütçesi (sn): geç kalan veri son başarılı değerden gösterilir
+PAGE_BUDGETS = {
+    "Piyasa Özeti": 6,
+    "Portföyüm": 8
+}
+MIN_FETCH_TIMEOUT = 1 # Bütçe azalsa da tek bir ağ isteğine verilen en kısa süre (sn)
+BACKGROUND_FETCH_BUDGET = 60 # Sayfa bütçesini aşıp arka planda süren çekime tanınan yeni süre (sn)
+LAST_GOOD_TTL = 7 * 86400 # Son başarılı sayfa verisinin saklanma süresi (sn)
+
+# Akan indikatörler (streaming_indicators): yeni bar geldikçe O(1) güncellenir
+STREAMING_SMA_WINDOWS = [50, 200]
+STREAMING_RSI_PERIOD = 14 # Basit ortalamalı RSI (analysis_module.calculate_rsi ile aynı)
+STREAMING_VOLUME_WINDOW = 20
+
+# Temel veri (ticker.info: PD/DD, FD/FAVÖK, sektör, YTD) önbellek süresi (saat)
+FUNDAMENTALS_TTL_HOURS = 24
+
+# Döviz kuru servisi bellek içi önbellek süresi (sn)
+FX_TTL_SECONDS = 300
+
 # Sembol - Kategori Eşleşmesi (Dengeleyici için)
 SYMBOL_CATEGORIES = {
     "AAPL": "Teknoloji",
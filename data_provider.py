@@ -0,0 +1,394 @@
+import yfinance as yf
+import pandas as pd
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+import config
+import price_store
+import routing_module
+import streaming_indicators
+from deadline_module import cap_timeout, deadline_context, remaining
+from provider_module import provider_call, now as provider_now, UpstreamThrottledError
+
+# --- TOPLU PİYASA VERİSİ SAĞLAYICI ---
+# Tüm modüller sembol başına yf.Ticker(...).history() yerine buradan geçer.
+
+OHLCV_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+def _unique_symbols(symbols):
+    """Keeps input order, drops blanks and duplicates."""
+    return list(dict.fromkeys(s for s in symbols if s))
+
+def _day_bars(period):
+    """Number of trading bars a day period asks for ('5d' -> 5), None for other periods."""
+    if period.endswith("d") and period[:-1].isdigit():
+        return int(period[:-1])
+    return None
+
+def period_to_start_date(period):
+    """
+    Converts a yfinance period string ('5d', '3mo', '1y', 'max') to a YYYY-MM-DD start date.
+    Day periods mean trading bars as in yfinance: the calendar window is widened to
+    cover weekends and long holidays (e.g. Bayram), and fetch_history keeps the last N bars.
+    """
+    if period in ("max", "ytd"):
+        return "1900-01-01" if period == "max" else provider_now().strftime("%Y-01-01")
+    today = pd.Timestamp(provider_now()).normalize()
+    num = int("".join(c for c in period if c.isdigit()) or 1)
+    if period.endswith("mo"):
+        start = today - pd.DateOffset(months=num)
+    elif period.endswith("y"):
+        start = today - pd.DateOffset(years=num)
+    else:
+        start = today - pd.DateOffset(days=num * 2 + 10)
+    return start.strftime("%Y-%m-%d")
+
+def _yahoo_download(symbols, window, interval):
+    raw = yf.download(
+        symbols,
+        **window,
+        interval=interval,
+        group_by="column",
+        auto_adjust=True,
+        actions=False,
+        progress=False,
+        threads=True,
+        timeout=cap_timeout(config.FETCH_TIMEOUT)
+    )
+    # yf.download kısıtlamada hata fırlatmaz, sembolleri boş bırakıp hatayı kaydeder
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    if any("rate limit" in str(msg).lower() or "too many requests" in str(msg).lower() for msg in errors.values()):
+        raise UpstreamThrottledError(f"Yahoo throttled download of {len(symbols)} symbols")
+    return raw
+
+def download_history(symbols, period="1y", interval="1d", start=None):
+    """
+    Downloads OHLCV history for many symbols in a single batched request (no local store).
+    If 'start' (YYYY-MM-DD) is given it takes precedence over 'period'.
+    Returns a wide DataFrame with (field, symbol) MultiIndex columns on a
+    timezone-naive date index. Symbols that fail are simply absent.
+    """
+    symbols = _unique_symbols(symbols)
+    if not symbols:
+        return pd.DataFrame()
+
+    window = {"start": start} if start else {"period": period}
+    try:
+        raw = provider_call(
+            "yahoo",
+            ("download", tuple(symbols), tuple(window.items()), interval),
+            lambda: _yahoo_download(symbols, window, interval)
+        )
+    except Exception as e:
+        print(f"Batch download error ({len(symbols)} symbols): {e}")
+        return pd.DataFrame()
+
+    if raw is None or raw.empty:
+        return pd.DataFrame()
+
+    # Eski yfinance sürümleri tek sembolde düz sütun döndürür
+    if not isinstance(raw.columns, pd.MultiIndex):
+        raw.columns = pd.MultiIndex.from_product([raw.columns, symbols[:1]])
+
+    fields = [f for f in OHLCV_FIELDS if f in raw.columns.get_level_values(0)]
+    wide = raw[fields]
+
+    if wide.index.tz is not None:
+        wide.index = wide.index.tz_localize(None)
+
+    # Hiç veri gelmeyen (hatalı) sembolleri at
+    wide = wide.dropna(axis=1, how="all")
+    return wide.sort_index()
+
+class _Flight:
+    """One in-progress upstream fetch that concurrent callers can wait on."""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _claim_flights(keys):
+    """
+    Claims the keys nobody is fetching yet.
+    Returns (owned_keys, flights_to_wait_on) for the caller.
+    """
+    owned, waiting = [], []
+    with _inflight_lock:
+        for key in keys:
+            flight = _inflight.get(key)
+            if flight is None:
+                _inflight[key] = _Flight()
+                owned.append(key)
+            else:
+                waiting.append(flight)
+    return owned, waiting
+
+def _release_flights(keys, result=None, error=None):
+    with _inflight_lock:
+        flights = [_inflight.pop(key) for key in keys if key in _inflight]
+    for flight in flights:
+        flight.result, flight.error = result, error
+        flight.event.set()
+
+def single_flight(key, fn, *args, **kwargs):
+    """
+    Runs fn(*args, **kwargs) once per key at a time: concurrent callers with the
+    same key (e.g. several Streamlit sessions after a cache expiry) wait for the
+    in-flight call and share its result instead of hitting upstream again.
+    """
+    owned, waiting = _claim_flights([key])
+    if waiting:
+        flight = waiting[0]
+        flight.event.wait(config.SINGLE_FLIGHT_WAIT)
+        if flight.event.is_set() and flight.error is None:
+            return flight.result
+        # Sahibi hata verdi veya zaman aşımı: kendimiz deneriz
+        return fn(*args, **kwargs)
+
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        _release_flights(owned, error=e)
+        raise
+    _release_flights(owned, result=result)
+    return result
+
+def _download_routed(symbols, period="1y", start=None):
+    """
+    download_history with BIST/FX fallback: symbols whose class Yahoo currently serves
+    badly skip the batch, and routable symbols missing from it are fetched one by one
+    through routing_module (healthiest backend, hedged).
+    Returns (wide frame, set of symbols served by a non-Yahoo backend). Those bars are
+    not split/dividend adjusted like Yahoo's (auto_adjust=True), so they must not be
+    written into the adjusted price store.
+    """
+    routable = {sym: routing_module.classify(sym) for sym in symbols if routing_module.classify(sym)}
+    rerouted = [sym for sym in routable if routing_module.preferred_backend(sym) != "yahoo"]
+    batch = [sym for sym in symbols if sym not in rerouted]
+
+    wide = download_history(batch, period=period, start=start) if batch else pd.DataFrame()
+    returned = set(wide.columns.get_level_values(1)) if not wide.empty else set()
+
+    # Toplu istek gecikmesi tekil isteklerle kıyaslanamaz: sınıf başına gelen sembol oranı bildirilir
+    # (tek bir kotasyondan çıkmış sembol bütün sınıfı Yahoo'dan uzaklaştırmasın)
+    for cls in set(routable[sym] for sym in batch if sym in routable):
+        members = [sym for sym in batch if routable.get(sym) == cls]
+        served = sum(sym in returned for sym in members) / len(members)
+        routing_module.report("yahoo", cls, None, served)
+
+    failed = [sym for sym in batch if sym in routable and sym not in returned]
+    missing = rerouted + failed
+    if not missing:
+        return wide, set()
+
+    def fetch_one(sym):
+        exclude = ("yahoo",) if sym in failed else ()
+        return routing_module.fetch_routed_history(sym, period=period, start=start, exclude=exclude)
+
+    hists = fetch_concurrently(fetch_one, missing)
+    frames = {sym: hist for sym, hist in zip(missing, hists) if hist is not None and not hist.empty}
+    if not frames:
+        return wide, set()
+    unadjusted = {sym for sym, hist in frames.items() if hist.attrs.get("source") != "yahoo"}
+    extra = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1)
+    wide = extra.sort_index() if wide.empty else pd.concat([wide, extra], axis=1).sort_index()
+    return wide, unadjusted
+
+def _refresh_store(symbols, period):
+    """
+    Brings the price store up to date for 'symbols' over 'period' (full or delta downloads).
+    Returns {symbol: bars} for symbols only a non-Yahoo backend could serve: these
+    unadjusted bars are used for this call but never stored, so the next refresh
+    tries Yahoo again.
+    """
+    period_start = period_to_start_date(period)
+    fresh_after = datetime.now() - timedelta(minutes=config.PRICE_STORE_REFRESH_MINUTES)
+    full, deltas = [], {}
+    transient = {}
+
+    for sym in symbols:
+        coverage = price_store.get_coverage(sym)
+        if coverage is None or coverage["covered_from"] > period_start:
+            full.append(sym)
+        elif coverage["updated_at"] < fresh_after:
+            deltas.setdefault(price_store.get_resume_date(sym), []).append(sym)
+
+    # Delta: sadece son kayıtlı tarihten sonrası (aynı başlangıçlılar tek istekte)
+    for start, syms in deltas.items():
+        if start is None:
+            full.extend(syms)
+            continue
+        wide, unadjusted = _download_routed(syms, start=start)
+        for sym in syms:
+            hist = get_symbol_history(wide, sym)
+            if hist.empty:
+                # Delta sondan bir önceki bardan başlar, boş dönmesi indirme hatası demektir:
+                # kontrol zamanı güncellenmez, bir sonraki çağrı yeniden dener
+                continue
+            if sym in unadjusted:
+                transient[sym] = hist
+            elif not price_store.matches_stored(sym, hist):
+                # Geçmiş yeniden düzeltilmiş (bölünme/temettü): tamamını yeniden indir
+                price_store.clear_symbol(sym)
+                streaming_indicators.reset_symbol(sym)
+                full.append(sym)
+            else:
+                price_store.save_prices(sym, hist)
+
+    # Full: depoda hiç olmayan veya yeterince geriye gitmeyen semboller
+    if full:
+        wide, unadjusted = _download_routed(full, period=period)
+        for sym in full:
+            hist = get_symbol_history(wide, sym)
+            if sym in unadjusted:
+                transient[sym] = hist
+                continue
+            price_store.save_prices(sym, hist, covered_from=period_start)
+    return transient
+
+def refresh_prices(symbols, period="1y"):
+    """
+    Brings the local price store up to date for 'symbols' (daily bars, see
+    fetch_history) without loading the bars back.
+    Returns {symbol: bars} for symbols served this time by an unadjusted fallback
+    source; those bars are not stored, so the store is behind for these symbols.
+    Concurrent calls for the same (symbol, period) share one upstream fetch.
+    """
+    symbols = _unique_symbols(symbols)
+    # Single-flight: başka oturumun çektiği semboller için onu bekle, gerisini biz çekelim
+    owned, waiting = _claim_flights([(sym, period) for sym in symbols])
+    try:
+        transient = _refresh_store([key[0] for key in owned], period)
+    finally:
+        _release_flights(owned)
+    for flight in waiting:
+        flight.event.wait(config.SINGLE_FLIGHT_WAIT)
+    return transient
+
+def fetch_history(symbols, period="1y", interval="1d"):
+    """
+    Returns a wide (field, symbol) OHLCV frame for the given symbols.
+    Daily bars are served from the local price store: only symbols never fetched
+    for this period are downloaded in full, the rest fetch the bars after their
+    last stored date. Day periods ('5d') return the last N trading bars.
+    Other intervals go straight to upstream.
+    Concurrent calls for the same (symbol, period) share one upstream fetch.
+    """
+    symbols = _unique_symbols(symbols)
+    if not symbols:
+        return pd.DataFrame()
+    if interval != "1d":
+        return single_flight(("download", tuple(symbols), period, interval),
+                             download_history, symbols, period=period, interval=interval)
+
+    transient = refresh_prices(symbols, period)
+    period_start = period_to_start_date(period)
+    bars = _day_bars(period)
+    frames = {}
+    for sym in symbols:
+        hist = price_store.load_prices(sym, start=period_start)
+        if sym in transient and not transient[sym].empty:
+            # Düzeltilmemiş yedek kaynak barları sadece bu çağrıda, depodakilerin ardına eklenir
+            extra = transient[sym][transient[sym].index >= period_start]
+            if hist.empty:
+                hist = extra
+            elif not extra.empty:
+                hist = pd.concat([hist[hist.index < extra.index.min()], extra])
+        if bars:
+            hist = hist.iloc[-bars:]
+        if not hist.empty:
+            frames[sym] = hist
+    if not frames:
+        return pd.DataFrame()
+
+    wide = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1)
+    return wide.sort_index()
+
+def get_symbol_history(wide, symbol):
+    """
+    Extracts a single symbol's OHLCV frame from a wide batch frame.
+    Rows where the symbol did not trade (e.g. other markets' holidays) are dropped.
+    Returns an empty DataFrame if the symbol is missing.
+    """
+    if wide is None or wide.empty or symbol not in wide.columns.get_level_values(1):
+        return pd.DataFrame()
+
+    hist = wide.xs(symbol, axis=1, level=1)
+    hist = hist.dropna(subset=["Close"]) if "Close" in hist.columns else pd.DataFrame()
+    hist.columns.name = None
+    return hist
+
+def get_close_frame(wide):
+    """Returns the Close prices as a (dates x symbols) frame."""
+    if wide is None or wide.empty or "Close" not in wide.columns.get_level_values(0):
+        return pd.DataFrame()
+    closes = wide["Close"]
+    closes.columns.name = None
+    return closes
+
+def fetch_symbol_history(symbol, period="1y"):
+    """Convenience wrapper for a single symbol's OHLCV history."""
+    return get_symbol_history(fetch_history([symbol], period=period), symbol)
+
+def fetch_concurrently(func, items, max_workers=None, timeout=None, total_timeout=None):
+    """
+    Runs func(item) for every item, at most 'max_workers' at a time.
+    Returns results in input order; items that raise or run longer than 'timeout'
+    seconds (measured from when they start) yield None instead of aborting the
+    whole batch. A timed-out call cannot be killed, but it stops holding a worker
+    slot, so the items queued behind it still start.
+    The whole batch is bounded by 'total_timeout' (default config.FETCH_BATCH_TIMEOUT,
+    never past the caller's deadline); items unfinished by then yield None.
+    Each item runs with a 'timeout' deadline, so network calls sized with
+    deadline_module.cap_timeout get a real per-request timeout.
+    """
+    items = list(items)
+    max_workers = max_workers or config.FETCH_MAX_WORKERS
+    timeout = timeout or config.FETCH_TIMEOUT
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    total_timeout = total_timeout or config.FETCH_BATCH_TIMEOUT
+    batch_end = time.monotonic() + total_timeout
+
+    # Havuz her öğeye bir iş parçacığı açabilir; eşzamanlılığı 'running' sınırlar.
+    # Asılı kalan çağrı zaman aşımında 'running'den düşer ve yerine sıradaki başlar.
+    pool = ThreadPoolExecutor(max_workers=len(items))
+    queue = list(range(len(items)))
+    running = {} # future -> (öğe sırası, başlama zamanı)
+
+    while queue or running:
+        # Çağıranın deadline'ı her turda okunur (arka plana düşen iş uzatılmış olabilir)
+        left = remaining()
+        end = batch_end if left is None else min(batch_end, time.monotonic() + left)
+        if time.monotonic() >= end:
+            print(f"Concurrent fetch batch timeout: {len(queue) + len(running)} of {len(items)} items unfinished")
+            break
+        while queue and len(running) < max_workers:
+            i = queue.pop(0)
+            # Her iş çağıranın bağlamını taşır, kendi zaman aşımı deadline olarak eklenir
+            running[pool.submit(deadline_context(timeout).run, func, items[i])] = (i, time.monotonic())
+
+        wait_for = min(0.25, max(0.0, end - time.monotonic()))
+        done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for fut in done:
+            i, _ = running.pop(fut)
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                print(f"Concurrent fetch error ({items[i]}): {e}")
+
+        now = time.monotonic()
+        for fut, (i, started) in list(running.items()):
+            if now - started > timeout:
+                print(f"Concurrent fetch timeout ({items[i]}): >{timeout}s")
+                running.pop(fut)
+
+    # Zaman aşımına uğrayan işler arka planda biter, sonucu beklenmez
+    pool.shutdown(wait=False, cancel_futures=True)
+    return results
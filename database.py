@@ -3,22 +3,119 @@ import os
 
 DB_NAME = "finance.db"
 
-def init_db():
+def create_price_tables(cursor):
     """
-    Veritabanını başlatır ve 'prices' tablosunu oluşturur.
+    Creates the OHLCV time-series store ('prices') and its coverage metadata.
+    Safe to call repeatedly; migrates the legacy single-price schema.
     """
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    # MIGRATION CHECK: Eski şema (id, date, symbol, price) -> OHLCV
+    try:
+        cursor.execute("SELECT close FROM prices LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='prices'")
+        if cursor.fetchone():
+            print("Migrating database: Converting prices to OHLCV store...")
+            cursor.execute("ALTER TABLE prices RENAME TO prices_legacy")
     
-    # Fiyatlar tablosu
+    # Fiyatlar tablosu (sembol + tarih anahtarlı günlük barlar)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS prices (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
             date TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL NOT NULL,
+            volume REAL,
+            PRIMARY KEY (symbol, date)
+        )
+    ''')
+    
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='prices_legacy'")
+    if cursor.fetchone():
+        cursor.execute('''
+            INSERT OR IGNORE INTO prices (symbol, date, close)
+            SELECT symbol, substr(date, 1, 10), price FROM prices_legacy
+        ''')
+        cursor.execute("DROP TABLE prices_legacy")
+    
+    # Hangi sembolün hangi tarihten itibaren eksiksiz indirildiği
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS price_coverage (
+            symbol TEXT PRIMARY KEY,
+            covered_from TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+
+def create_fundamentals_table(cursor):
+    """
+    Creates the long-TTL cache for ticker.info payloads (JSON, keyed by symbol).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fundamentals (
+            symbol TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            fetched_at TEXT NOT NULL
+        )
+    ''')
+
+def create_symbol_map_table(cursor):
+    """
+    Creates the persisted symbol resolution map (bare symbol + market hint -> Yahoo
+    ticker, exchange, currency). market is '' when resolved without a hint.
+    """
+    # MIGRATION CHECK: Pazar bilgisi olmayan eski eşleşmeler hangi sırayla çözüldüğü
+    # bilinmediği için atılır (sadece önbellek, ilk kullanımda yeniden çözülür)
+    try:
+        cursor.execute("SELECT market FROM symbol_map LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute("DROP TABLE IF EXISTS symbol_map")
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symbol_map (
             symbol TEXT NOT NULL,
-            price REAL NOT NULL
+            market TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            exchange TEXT,
+            currency TEXT NOT NULL,
+            resolved_at TEXT NOT NULL,
+            PRIMARY KEY (symbol, market)
+        )
+    ''')
+
+def create_indicator_state_table(cursor):
+    """
+    Creates the streaming indicator state (SMA buffers, Wilder RSI averages, volume mean)
+    kept per symbol next to the price store (JSON, see streaming_indicators).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS indicator_state (
+            symbol TEXT PRIMARY KEY,
+            last_date TEXT NOT NULL,
+            state TEXT NOT NULL,
+            updated_at TEXT NOT NULL
         )
     ''')
+
+def init_db():
+    """
+    Veritabanını başlatır ve 'prices' tablosunu oluşturur.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    cursor = conn.cursor()
+    
+    # Fiyatlar tablosu
+    create_price_tables(cursor)
+    
+    # Temel veriler (ticker.info) önbelleği
+    create_fundamentals_table(cursor)
+    
+    # Sembol çözümleme haritası (THYAO -> THYAO.IS, IST, TRY)
+    create_symbol_map_table(cursor)
+    
+    # Akan (streaming) indikatör durumu: yeni bar O(1) güncellenir
+    create_indicator_state_table(cursor)
     
     # Transactions tablosu (Updated with user_email)
     cursor.execute('''
@@ -0,0 +1,118 @@
+import time
+import threading
+import contextvars
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import config
+from cache_module import cache_get, cache_get_meta, cache_set, is_empty
+
+# --- SAYFA BAŞINA SÜRE BÜTÇESİ (DEADLINE) ---
+# Her sayfa config.PAGE_BUDGETS kadar süre alır; bu süre sayfadaki veri çekimlerine
+# 'share' oranında bölünür. Zamanında dönmeyen çekim son başarılı değerden (bayat
+# işaretiyle) gösterilir, iş arka planda bitip bir sonraki çizim için kaydedilir.
+# Sadece run_within_budget ile korunan çekimler bütçeye tabidir: işin kendi dilimi
+# contextvars ile alt çağrılara taşınır, HTTP / yfinance zaman aşımları ve tekrar
+# denemeler bu süreyi aşmaz (bkz. cap_timeout, remaining). Korunmayan çağrılar
+# (son başarılı değer yedeği olmayanlar) sayfa bütçesinden etkilenmez.
+
+_page = contextvars.ContextVar("page_budget", default=None) # sayfa: (bitiş monotonic, toplam sn)
+# Korunan çağrı: [bitiş monotonic, toplam sn]. Liste (değiştirilebilir): süre aşılınca
+# arka planda süren iş, bağlamına dokunmadan config.BACKGROUND_FETCH_BUDGET kadar uzatılır.
+_deadline = contextvars.ContextVar("deadline", default=None)
+_inflight = {}
+_inflight_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=8)
+
+def start_page_budget(page):
+    """
+    Starts the time budget of a page (config.PAGE_BUDGETS) for the rest of this
+    script run. Only calls wrapped in run_within_budget share it; pages without a
+    configured budget run unbounded.
+    """
+    total = config.PAGE_BUDGETS.get(page)
+    _page.set((time.monotonic() + total, total) if total else None)
+
+def remaining():
+    """Seconds left in the current call's deadline, or None outside a budgeted call."""
+    current = _deadline.get()
+    if current is None:
+        return None
+    return max(0.0, current[0] - time.monotonic())
+
+def cap_timeout(timeout):
+    """Caps a network timeout to the remaining budget (never below config.MIN_FETCH_TIMEOUT)."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(config.MIN_FETCH_TIMEOUT, min(timeout, left))
+
+def deadline_context(seconds):
+    """
+    Copy of the current context with a deadline 'seconds' from now (or the current
+    deadline if that is sooner); run a call in it with ctx.run(func, ...).
+    """
+    ctx = contextvars.copy_context()
+    left = remaining()
+    if left is not None:
+        seconds = min(seconds, left)
+    ctx.run(_deadline.set, [time.monotonic() + seconds, seconds])
+    return ctx
+
+def _slice(share):
+    """Seconds a fetch with this share of the page budget may take, bounded by what is left."""
+    current = _page.get()
+    if current is None:
+        return None
+    return min(max(0.0, current[0] - time.monotonic()), current[1] * share)
+
+def _freshness(updated_at, timed_out):
+    age = int((datetime.now() - updated_at).total_seconds()) if updated_at else None
+    return {"updated_at": updated_at, "age_seconds": age, "is_stale": timed_out, "timed_out": timed_out}
+
+def _run_and_store(key, func, args, kwargs):
+    try:
+        value = func(*args, **kwargs)
+        if not is_empty(value):
+            cache_set(("last_good", key), value, config.LAST_GOOD_TTL)
+        return value
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def run_within_budget(key, func, *args, share=1.0, **kwargs):
+    """
+    Runs func(*args, **kwargs) with 'share' (0-1) of the current page budget.
+    Returns (value, freshness) where freshness is {'updated_at', 'age_seconds',
+    'is_stale', 'timed_out'}. If the call is late or fails, the last good value
+    for 'key' is returned instead (None if there never was one); a late call keeps
+    running in the background with a fresh config.BACKGROUND_FETCH_BUDGET deadline
+    and refreshes that value. Without an active page budget the call simply blocks.
+    """
+    wait_for = _slice(share)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        if flight is None:
+            # Alt çağrılar bu işin kendi dilimini deadline olarak görür
+            ctx = contextvars.copy_context()
+            budget = None
+            if wait_for is not None:
+                budget = [time.monotonic() + wait_for, wait_for]
+                ctx.run(_deadline.set, budget)
+            flight = (_executor.submit(ctx.run, _run_and_store, key, func, args, kwargs), budget)
+            _inflight[key] = flight
+    future, budget = flight
+
+    try:
+        return future.result(timeout=wait_for), _freshness(datetime.now(), False)
+    except FuturesTimeout:
+        print(f"Budget exceeded ({key}): >{wait_for:.1f}s, serving last good value")
+        if budget is not None:
+            # Sayfa artık beklemiyor: arka plandaki iş normal zaman aşımları ve tekrar denemelerle sürsün
+            budget[:] = [time.monotonic() + config.BACKGROUND_FETCH_BUDGET, config.BACKGROUND_FETCH_BUDGET]
+    except Exception as e:
+        print(f"Budgeted fetch error ({key}): {e}")
+
+    meta = cache_get_meta(("last_good", key))
+    value = cache_get(("last_good", key), allow_stale=True)
+    updated_at = datetime.fromtimestamp(meta["created"]) if meta and value is not None else None
+    return value, _freshness(updated_at, True)
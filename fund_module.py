@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
 import borsapy as bp
+from cache_module import disk_cached
+from provider_module import provider_call, CircuitOpenError
 
 # --- TEFAS VERİLERİNİ ÇEKME MODÜLÜ ---
 
 @st.cache_data(ttl=3600, show_spinner=False)
+@disk_cached(ttl=3600)
 def fetch_tefas_data():
     """
     Yatırım (YAT) ve Emeklilik (EMK) fonlarını çeker, sütunları eşitler ve birleştirir.
@@ -13,7 +16,7 @@ def fetch_tefas_data():
     try:
         # 1. Yatırım Fonlarını Çek
         try:
-            df_yat = bp.screen_funds(fund_type="YAT", limit=10000)
+            df_yat = provider_call("borsapy", ("screen_funds", "YAT"), lambda: bp.screen_funds(fund_type="YAT", limit=10000))
             if not df_yat.empty:
                 df_yat['Tür'] = 'Yatırım'
         except:
@@ -21,7 +24,7 @@ def fetch_tefas_data():
 
         # 2. Emeklilik Fonlarını Çek
         try:
-            df_emk = bp.screen_funds(fund_type="EMK", limit=10000)
+            df_emk = provider_call("borsapy", ("screen_funds", "EMK"), lambda: bp.screen_funds(fund_type="EMK", limit=10000))
             if not df_emk.empty:
                 df_emk['Tür'] = 'Emeklilik'
         except:
@@ -62,6 +65,7 @@ def fetch_tefas_data():
         return pd.DataFrame()
 
 @st.cache_data(ttl=3600)
+@disk_cached(ttl=3600)
 def get_fund_history(fund_codes):
     """
     Seçilen fonların geçmiş verilerini getirir.
@@ -72,9 +76,8 @@ def get_fund_history(fund_codes):
 
     for code in fund_codes:
         try:
-            fund = bp.Fund(code)
             # Emeklilik fonu olup olmadığını anlamak için try-except bloğu korur
-            df = fund.history(period="1y")
+            df = provider_call("borsapy", ("fund_history", code, "1y"), lambda: bp.Fund(code).history(period="1y"))
             
             # Sütun isimlendirme (price veya close gelebilir)
             col_name = 'price' if 'price' in df.columns else 'close'
@@ -82,7 +85,12 @@ def get_fund_history(fund_codes):
             if not df.empty and col_name in df.columns:
                 history_df[code] = df[col_name]
                  
-        except Exception:
+        except CircuitOpenError as e:
+            # Kaynak çökmüş: kalan fonlar için boşuna istek atılmaz
+            print(f"Fon geçmişi alınamadı, kalan fonlar atlandı: {e}")
+            break
+        except Exception as e:
+            print(f"Fon geçmişi alınamadı ({code}): {e}")
             continue
             
     return history_df
@@ -0,0 +1,75 @@
+import sqlite3
+import json
+import yfinance as yf
+from datetime import datetime, timedelta
+import config
+from database import DB_NAME, create_fundamentals_table
+from data_provider import single_flight
+from provider_module import provider_call
+
+# --- TEMEL VERİ ÖNBELLEĞİ (ticker.info) ---
+# Fiyatlar 30 dakikada bir yenilenir; PD/DD, FD/FAVÖK, sektör gibi alanlar
+# en fazla günde bir değiştiği için ayrı ve uzun ömürlü tutulur.
+
+_schema_ready = False
+
+def _connect():
+    global _schema_ready
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    if not _schema_ready:
+        create_fundamentals_table(conn.cursor())
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+def _load(symbol):
+    """Returns (payload_dict, fetched_at) or (None, None)."""
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT payload, fetched_at FROM fundamentals WHERE symbol = ?", (symbol,))
+    res = cursor.fetchone()
+    conn.close()
+    if not res:
+        return None, None
+    return json.loads(res[0]), datetime.strptime(res[1], "%Y-%m-%d %H:%M:%S")
+
+def _save(symbol, info):
+    conn = _connect()
+    conn.execute(
+        "INSERT OR REPLACE INTO fundamentals (symbol, payload, fetched_at) VALUES (?, ?, ?)",
+        (symbol, json.dumps(info, default=str), datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+    conn.close()
+
+def get_ticker_info(symbol, ttl_hours=None):
+    """
+    Returns the yfinance info dict for a symbol, served from SQLite while it is
+    younger than ttl_hours (default config.FUNDAMENTALS_TTL_HOURS).
+    If the refresh fails, the stale payload is returned; None if nothing is known.
+    """
+    ttl_hours = ttl_hours if ttl_hours is not None else config.FUNDAMENTALS_TTL_HOURS
+    cached, fetched_at = _load(symbol)
+    if cached is not None and datetime.now() - fetched_at < timedelta(hours=ttl_hours):
+        return cached
+
+    try:
+        info = single_flight(("info", symbol), lambda: provider_call("yahoo", ("info", symbol), lambda: yf.Ticker(symbol).info))
+    except Exception as e:
+        print(f"Fundamentals fetch error for {symbol}: {e}")
+        return cached
+
+    if info:
+        _save(symbol, info)
+        return info
+    return cached
+
+def invalidate(symbol=None):
+    """Drops the cached payload for one symbol (or all symbols)."""
+    conn = _connect()
+    if symbol:
+        conn.execute("DELETE FROM fundamentals WHERE symbol = ?", (symbol,))
+    else:
+        conn.execute("DELETE FROM fundamentals")
+    conn.commit()
+    conn.close()
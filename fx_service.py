@@ -0,0 +1,83 @@
+import threading
+import time
+import pandas as pd
+import config
+from data_provider import fetch_history, get_symbol_history, period_to_start_date
+
+# --- ORTAK DÖVİZ KURU SERVİSİ ---
+# USD/TRY ve EUR/TRY tek bir bellek içi kopyadan (kısa TTL) ve yerel fiyat
+# deposundan (disk) tüm modüllere dağıtılır. Çapraz kurlar yerelde türetilir.
+
+# 1 birim döviz kaç TL: Yahoo sembolleri
+TRY_PAIRS = {
+    "USD": "TRY=X",
+    "EUR": "EURTRY=X"
+}
+
+DEFAULT_RATES = {"USD": 35.0, "EUR": 38.0}
+
+_cache = {} # {currency: {"series": Series, "start": str, "loaded_at": float}}
+_lock = threading.Lock()
+
+def _load_try_history(currency, period):
+    """Returns the cached TRY-per-unit Close series for a currency, refreshing it if needed."""
+    period_start = period_to_start_date(period)
+    with _lock:
+        entry = _cache.get(currency)
+        if entry and entry["start"] <= period_start and time.time() - entry["loaded_at"] < config.FX_TTL_SECONDS:
+            return entry["series"]
+
+        # Her zaman istenenlerin en uzunu tutulur ki kısa periyotlar aynı kopyadan dilimlensin
+        if entry and entry["start"] < period_start:
+            period_start = entry["start"]
+            period = entry["period"]
+
+        symbol = TRY_PAIRS.get(currency, f"{currency}TRY=X")
+        hist = get_symbol_history(fetch_history([symbol], period=period), symbol)
+        if hist.empty:
+            return entry["series"] if entry else pd.Series(dtype=float)
+
+        series = hist["Close"]
+        series.name = f"{currency}/TRY"
+        _cache[currency] = {"series": series, "start": period_start, "period": period, "loaded_at": time.time()}
+        return series
+
+def get_history(currency="USD", quote="TRY", period="1y"):
+    """
+    Returns a daily Close series of 'quote' per 1 unit of 'currency' (e.g. USD/TRY).
+    Cross rates (EUR/USD ...) are derived from the two TRY legs.
+    """
+    currency, quote = currency.upper(), quote.upper()
+    if currency == quote:
+        return pd.Series(dtype=float)
+
+    period_start = period_to_start_date(period)
+    base = _load_try_history(currency, period) if currency != "TRY" else None
+    counter = _load_try_history(quote, period) if quote != "TRY" else None
+
+    if counter is None:
+        series = base
+    elif base is None:
+        series = 1 / counter
+    else:
+        aligned = pd.concat([base, counter], axis=1).ffill().dropna()
+        series = aligned.iloc[:, 0] / aligned.iloc[:, 1]
+
+    if not series.empty:
+        series = series[series.index >= period_start]
+    series.name = f"{currency}/{quote}"
+    return series
+
+def get_rate(currency="USD", quote="TRY", fallback=None):
+    """
+    Returns the latest 'quote' per 1 unit of 'currency'.
+    Falls back to DEFAULT_RATES (or 'fallback') when no data is available.
+    """
+    series = get_history(currency, quote, period="1mo")
+    if series is not None and not series.empty:
+        return float(series.iloc[-1])
+    if fallback is not None:
+        return fallback
+    if quote.upper() == "TRY":
+        return DEFAULT_RATES.get(currency.upper(), 1.0)
+    return 1.0
@@ -0,0 +1,299 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# --- VEKTÖREL İNDİKATÖR MOTORU (GENİŞ ÇERÇEVE: TARİH x SEMBOL) ---
+# analysis_module'deki tek sembollük hesapların (SMA, RSI, hacim oranı, teknik puan)
+# tüm evrene tek NumPy geçişiyle uygulanan karşılıkları.
+# Semboller farklı günlerde işlem görebilir (tatiller): her sütun önce kendi işlem
+# günlerine "sıkıştırılır", hesaplanır ve tarihlere geri yayılır. Böylece sonuçlar
+# sembol başına get_symbol_history() + analysis_module ile birebir aynıdır.
+
+def _compact(values, valid):
+    """
+    Moves each column's valid rows to the top (order preserved).
+    Returns (compacted values, row order used, number of valid rows per column).
+    """
+    order = np.argsort(~valid, axis=0, kind="stable")
+    compacted = np.take_along_axis(values, order, axis=0)
+    counts = valid.sum(axis=0)
+    rows = np.arange(len(values))[:, None]
+    compacted[rows >= counts] = np.nan
+    return compacted, order, counts
+
+def _expand(compacted, order, counts):
+    """Inverse of _compact: scatters results back to their dates (NaN on non-trading rows)."""
+    rows = np.arange(len(compacted))[:, None]
+    compacted = np.where(rows < counts, compacted, np.nan)
+    out = np.empty_like(compacted)
+    np.put_along_axis(out, order, compacted, axis=0)
+    return out
+
+def _rolling_mean(values, window):
+    """
+    Rolling mean over axis 0 via cumulative sums. Like pandas rolling(window).mean():
+    NaN until 'window' rows are available and for any window containing a NaN.
+    """
+    out = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return out
+    missing = np.isnan(values)
+    csum = np.cumsum(np.where(missing, 0.0, values), axis=0)
+    cmiss = np.cumsum(missing, axis=0)
+
+    sums = csum[window - 1:].copy()
+    sums[1:] -= csum[:-window]
+    gaps = cmiss[window - 1:].copy()
+    gaps[1:] -= cmiss[:-window]
+    out[window - 1:] = np.where(gaps > 0, np.nan, sums / window)
+    return out
+
+def _rsi(close, window):
+    delta = np.full(close.shape, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    # pandas 'where(delta > 0, 0)' ilk (NaN) farkı 0 sayar: aynısı
+    gain = _rolling_mean(np.where(delta > 0, delta, 0.0), window)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+
+def _field(wide, field):
+    return wide[field] if field in wide.columns.get_level_values(0) else None
+
+def _prepare(close):
+    """Returns (compacted close, order, counts) for a dates x symbols Close frame."""
+    values = close.to_numpy(dtype=np.float64)
+    return _compact(values, ~np.isnan(values))
+
+def _frame(values, like):
+    return pd.DataFrame(values, index=like.index, columns=like.columns)
+
+def sma(close, window):
+    """Simple moving average of every column of a dates x symbols Close frame."""
+    compacted, order, counts = _prepare(close)
+    return _frame(_expand(_rolling_mean(compacted, window), order, counts), close)
+
+def rsi(close, window=14):
+    """RSI (simple-mean, as analysis_module.calculate_rsi) for every column."""
+    compacted, order, counts = _prepare(close)
+    return _frame(_expand(_rsi(compacted, window), order, counts), close)
+
+def volume_ratio(volume, close, window=20):
+    """Volume / its 'window'-day mean for every column, on each symbol's trading days."""
+    valid = ~np.isnan(close.to_numpy(dtype=np.float64))
+    vol, order, counts = _compact(volume.reindex_like(close).to_numpy(dtype=np.float64), valid)
+    avg = _rolling_mean(vol, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(avg > 0, vol / avg, 1.0)
+    return _frame(_expand(ratio, order, counts), close)
+
+def technical_scores(wide):
+    """
+    Scores every symbol of a wide (field, symbol) OHLCV frame on its last bar,
+    exactly like analysis_module.calculate_technical_score does per symbol.
+    Returns a DataFrame indexed by symbol with 'score' and 'rsi' columns.
+    """
+    close = _field(wide, "Close")
+    if close is None or close.empty:
+        return pd.DataFrame(columns=["score", "rsi"])
+
+    values, order, counts = _prepare(close)
+    volume = _field(wide, "Volume")
+    if volume is not None:
+        vol, _, _ = _compact(volume.reindex_like(close).to_numpy(dtype=np.float64), ~np.isnan(close.to_numpy(dtype=np.float64)))
+    else:
+        vol = np.full(values.shape, np.nan)
+
+    last = np.maximum(counts - 1, 0)
+    pick = lambda arr: arr[last, np.arange(arr.shape[1])]
+
+    price = pick(values)
+    current_rsi = pick(_rsi(values, 14))
+    sma50 = pick(_rolling_mean(values, 50))
+    sma200 = np.where(counts >= 200, pick(_rolling_mean(values, 200)), sma50)
+    avg_vol = pick(_rolling_mean(vol, 20))
+    curr_vol = pick(vol)
+
+    score = score_from_indicators(price, current_rsi, sma50, sma200, avg_vol, curr_vol, counts)
+    return pd.DataFrame({"score": score, "rsi": current_rsi}, index=close.columns)
+
+def score_from_indicators(price, current_rsi, sma50, sma200, avg_vol, curr_vol, bars):
+    """
+    Vectorized analysis_module.calculate_technical_score: all arguments are equal-length
+    arrays (one element per symbol or per bar). 'sma200' must already fall back to SMA50
+    where fewer than 200 bars exist; 'bars' is the number of bars seen (<50 -> score 50).
+    Returns a float array of scores rounded to 2 decimals.
+    """
+    # 1. RSI (%30) - NaN RSI, tek sembollük sürümdeki min/max davranışıyla 100 puan alır
+    rsi_score = np.where(current_rsi > 50, 100 - current_rsi, current_rsi + 50)
+    rsi_score = np.where(np.isnan(rsi_score), 100, np.clip(rsi_score, 0, 100))
+
+    # 2. Trend (%40) - NaN karşılaştırmaları False (puan yok)
+    with np.errstate(invalid="ignore"):
+        trend_score = 30 * (price > sma50) + 40 * (sma50 > sma200) + 30 * (price > sma200)
+
+    # 3. Hacim (%30)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_ratio = np.where(avg_vol > 0, curr_vol / avg_vol, 1.0)
+    vol_score = np.where(np.isnan(vol_ratio), 100, np.minimum(100, vol_ratio * 50))
+
+    # Tek sembollük sürüm de NumPy skaleri yuvarlar: np.round ile aynı sonuç
+    score = np.round(rsi_score * 0.3 + trend_score * 0.4 + vol_score * 0.3, 2)
+    return np.where(np.asarray(bars) < 50, 50.0, score)
+
+# --- GENİŞLETİLMİŞ İNDİKATÖRLER (EMA, WILDER RSI, MACD, BOLLINGER, ATR, OBV) ---
+# Her çekirdek tarih x sembol çerçeveleri alır, sütunları kendi işlem günlerine
+# sıkıştırıp tek geçişte hesaplar. Sonuçlar get_indicator() ile
+# (sembol, parametreler, ilk ve son bar) başına bellekte tutulur.
+
+def _ewm(values, alpha):
+    """Recursive exponential average down axis 0 (y0 = x0, y = (1 - alpha) * y + alpha * x)."""
+    return pd.DataFrame(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def _wilder(values, period, first=0):
+    """
+    Wilder smoothing: the first output (row first + period - 1) is the simple mean of the
+    first 'period' values, then y = (y * (period - 1) + x) / period.
+    """
+    out = np.full(values.shape, np.nan)
+    seed_row = first + period - 1
+    if len(values) <= seed_row:
+        return out
+    x = values[seed_row:].copy()
+    x[0] = values[first:seed_row + 1].mean(axis=0)
+    out[seed_row:] = _ewm(x, 1.0 / period)
+    return out
+
+def _apply(close, kernel, *others):
+    """Runs kernel(compacted close, *compacted others) and scatters every output back to dates."""
+    compacted, order, counts = _prepare(close)
+    valid = close.notna().to_numpy()
+    extra = [_compact(o.reindex_like(close).to_numpy(dtype=np.float64), valid)[0] for o in others]
+    result = kernel(compacted, *extra)
+    if isinstance(result, dict):
+        return {name: _frame(_expand(arr, order, counts), close) for name, arr in result.items()}
+    return _frame(_expand(result, order, counts), close)
+
+def ema(close, span):
+    """Exponential moving average (alpha = 2 / (span + 1)), seeded with the first close."""
+    return _apply(close, lambda c: _ewm(c, 2.0 / (span + 1)))
+
+def wilder_rsi(close, window=14):
+    """RSI with Wilder smoothing (the usual charting-platform RSI)."""
+    def kernel(c):
+        delta = np.full(c.shape, np.nan)
+        delta[1:] = c[1:] - c[:-1]
+        gain = _wilder(np.where(delta > 0, delta, 0.0), window, first=1)
+        loss = _wilder(np.where(delta < 0, -delta, 0.0), window, first=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 100 - 100 / (1 + gain / loss)
+    return _apply(close, kernel)
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram: {'macd', 'signal', 'hist'}."""
+    def kernel(c):
+        line = _ewm(c, 2.0 / (fast + 1)) - _ewm(c, 2.0 / (slow + 1))
+        sig = _ewm(line, 2.0 / (signal + 1))
+        return {"macd": line, "signal": sig, "hist": line - sig}
+    return _apply(close, kernel)
+
+def bollinger(close, window=20, num_std=2):
+    """Bollinger bands (population std): {'middle', 'upper', 'lower'}."""
+    def kernel(c):
+        middle = _rolling_mean(c, window)
+        std = np.full(c.shape, np.nan)
+        if len(c) >= window:
+            std[window - 1:] = np.lib.stride_tricks.sliding_window_view(c, window, axis=0).std(axis=-1)
+        return {"middle": middle, "upper": middle + num_std * std, "lower": middle - num_std * std}
+    return _apply(close, kernel)
+
+def atr(high, low, close, window=14):
+    """Average True Range with Wilder smoothing."""
+    def kernel(c, h, l):
+        prev = np.full(c.shape, np.nan)
+        prev[1:] = c[:-1]
+        with np.errstate(invalid="ignore"):
+            tr = np.fmax(h - l, np.fmax(np.abs(h - prev), np.abs(l - prev)))
+        return _wilder(tr, window)
+    return _apply(close, kernel, high, low)
+
+def obv(close, volume):
+    """On-Balance Volume, starting at 0 on each symbol's first bar."""
+    def kernel(c, v):
+        direction = np.zeros(c.shape)
+        direction[1:] = np.sign(c[1:] - c[:-1])
+        flow = np.nan_to_num(direction * v)
+        return np.cumsum(flow, axis=0)
+    return _apply(close, kernel, volume)
+
+# ad -> (çekirdek, gereken alanlar)
+KERNELS = {
+    "ema": (ema, ["Close"]),
+    "rsi": (wilder_rsi, ["Close"]),
+    "macd": (macd, ["Close"]),
+    "bollinger": (bollinger, ["Close"]),
+    "atr": (atr, ["High", "Low", "Close"]),
+    "obv": (obv, ["Close", "Volume"])
+}
+
+_MEMO_SIZE = 1024
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+def compute_indicator(wide, name, **params):
+    """
+    Runs one kernel on a wide (field, symbol) OHLCV frame.
+    Returns {symbol: DataFrame} (one column per output, e.g. 'macd', 'signal', 'hist').
+    """
+    kernel, fields = KERNELS[name]
+    if any(f not in wide.columns.get_level_values(0) for f in fields):
+        return {}
+    result = kernel(*[wide[f] for f in fields], **params)
+    outputs = result if isinstance(result, dict) else {name: result}
+    return {sym: pd.DataFrame({out: frame[sym] for out, frame in outputs.items()}).dropna(how="all")
+            for sym in wide["Close"].columns}
+
+def get_indicator(symbols, name, period="1y", **params):
+    """
+    Returns {symbol: DataFrame} for indicator 'name' (see KERNELS) over 'period',
+    read from the shared price store. Results are memoized per
+    (symbol, name, params, period, first and last bar): repeated page views and users
+    only pay for symbols that received a new bar, an intraday revision of the last
+    bar (its fields are part of the key) or a re-adjusted history (first close changes).
+    """
+    from data_provider import fetch_history # data_provider -> indicator_engine döngüsünü önler
+    wide = fetch_history(symbols, period=period)
+    if wide.empty:
+        return {}
+
+    close = wide["Close"]
+    fields = [f for f in KERNELS[name][1] if f in wide.columns.get_level_values(0)]
+    param_key = tuple(sorted(params.items()))
+    keys = {}
+    for sym in close.columns:
+        first, last = close[sym].first_valid_index(), close[sym].last_valid_index()
+        if last is not None:
+            # NaN anahtarda kendine eşit olmaz: None'a çevrilir
+            bar = tuple(None if pd.isna(v) else float(v) for v in (wide[f][sym].loc[last] for f in fields))
+            keys[sym] = (sym, name, param_key, period, first, float(close[sym].loc[first]), last, bar)
+
+    results, missing = {}, []
+    with _memo_lock:
+        for sym, key in keys.items():
+            if key in _memo:
+                _memo.move_to_end(key)
+                results[sym] = _memo[key]
+            else:
+                missing.append(sym)
+
+    if missing:
+        computed = compute_indicator(wide.loc[:, (slice(None), missing)], name, **params)
+        with _memo_lock:
+            for sym, frame in computed.items():
+                _memo[keys[sym]] = frame
+                results[sym] = frame
+            while len(_memo) > _MEMO_SIZE:
+                _memo.popitem(last=False)
+    return results
@@ -1,9 +1,12 @@
-import streamlit as st
 import borsapy as bp
 import pandas as pd
 from datetime import datetime
+from cache_module import swr_cached
+from provider_module import provider_call
 
-@st.cache_data(ttl=900)
+# Stale-while-revalidate: süresi geçen özet anında döner, arka planda yenilenir.
+# Yaş bilgisi için: get_market_summary.with_meta(calendar_country=...)
+@swr_cached(ttl=900)
 def get_market_summary(calendar_country="TR"):
     """
     Fetches daily market info.
@@ -13,39 +16,48 @@ def get_market_summary(calendar_country="TR"):
     - bond_2y: 2Y Bond yield
     - bond_10y: 10Y Bond yield
     - calendar: DataFrame of upcoming events
+    Returns None if every source failed, so the cache keeps the last good summary
+    instead of storing (and serving as fresh) a summary of Nones.
     """
     data = {"usd": None, "eur": None, "bond_2y": None, "bond_10y": None, "calendar": None}
     
     # 1. Döviz
     try:
-        data["usd"] = bp.FX("USD").current
-        data["eur"] = bp.FX("EUR").current
+        data["usd"] = provider_call("borsapy", ("fx", "USD"), lambda: bp.FX("USD").current)
+        data["eur"] = provider_call("borsapy", ("fx", "EUR"), lambda: bp.FX("EUR").current)
     except: pass
     
     # 2. Tahvil
     try:
-        data["bond_2y"] = bp.Bond("2Y").yield_rate
-        data["bond_10y"] = bp.Bond("10Y").yield_rate
+        data["bond_2y"] = provider_call("borsapy", ("bond", "2Y"), lambda: bp.Bond("2Y").yield_rate)
+        data["bond_10y"] = provider_call("borsapy", ("bond", "10Y"), lambda: bp.Bond("10Y").yield_rate)
     except: pass
     
     # 3. Takvim
     try:
-        cal = bp.EconomicCalendar()
         # calendar_country can be "TR", "US", or None for All
         country_code = calendar_country if calendar_country in ["TR", "US"] else None
-        events = cal.events(period="1w", country=country_code, importance="high")
+        events = provider_call(
+            "borsapy", ("calendar", "1w", country_code, "high"),
+            lambda: bp.EconomicCalendar().events(period="1w", country=country_code, importance="high")
+        )
         if events is not None and not events.empty:
             if 'Date' in events.columns:
                 events = events.sort_values(by='Date')
             data["calendar"] = events
     except: pass
     
+    if all(value is None for value in data.values()):
+        return None
     return data
 
 def get_daily_info_note():
     # Wrapper for console printing
     print(f"\n>>> Günlük Bilgi Notu Hazırlanıyor ({datetime.now().strftime('%Y-%m-%d')})...")
     data = get_market_summary()
+    if data is None:
+        print("Piyasa verileri alınamadı.")
+        return
     
     print(f"\n[ Piyasa Özeti ]")
     print(f"USD/TRY: {data['usd']}")
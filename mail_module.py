@@ -3,10 +3,12 @@ import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import config
+from data_provider import fetch_history, get_symbol_history
+import fx_service
+from cache_module import disk_cached
 from sentiment_module import get_sentiment_score
 import os
 import time
@@ -102,6 +104,7 @@ def calculate_user_portfolio_performance(user_email):
         }
     return None
 
+@disk_cached(ttl=900)
 def fetch_newsletter_data():
     """
     Fetches data for all assets defined in key config.NEWSLETTER_ASSETS.
@@ -109,12 +112,13 @@ def fetch_newsletter_data():
     results = {}
     usd_rate = 35.0 # Default fallback
     
-    try:
-        usd_hist = yf.Ticker("TRY=X").history(period="1mo")
-        if not usd_hist.empty:
-            usd_rate = usd_hist['Close'].iloc[-1]
-    except:
-        pass
+    # Tüm semboller tek toplu istekle çekilir (Gram hesapları için GC=F/SI=F dahil)
+    symbols = ["GC=F", "SI=F"]
+    for assets in config.NEWSLETTER_ASSETS.values():
+        symbols += [a["symbol"] for a in assets if not a.get("manual") and not a.get("calc")]
+    prices = fetch_history(symbols, period="3mo")
+    
+    usd_rate = fx_service.get_rate("USD", fallback=usd_rate)
 
     for category, assets in config.NEWSLETTER_ASSETS.items():
         results[category] = []
@@ -135,7 +139,7 @@ def fetch_newsletter_data():
                     if "GOLD" in asset['symbol']: base_sym = "GC=F"
                     else: base_sym = "SI=F"
                         
-                    base_hist = yf.Ticker(base_sym).history(period="3mo")
+                    base_hist = get_symbol_history(prices, base_sym)
                     if not base_hist.empty:
                         base_metrics = calculate_changes(base_hist)
                         if base_metrics:
@@ -153,7 +157,7 @@ def fetch_newsletter_data():
 
                 # 3. Standard Assets
                 symbol = asset["symbol"]
-                hist = yf.Ticker(symbol).history(period="3mo")
+                hist = get_symbol_history(prices, symbol)
                 metrics = calculate_changes(hist)
                 
                 if metrics:
@@ -171,7 +175,7 @@ def fetch_newsletter_data():
                     })
                     
             except Exception as e:
-                # print(f"Error fetching {asset['name']}: {e}")
+                print(f"Bülten verisi alınamadı ({asset['name']}): {e}")
                 results[category].append({
                     "name": asset["name"], 
                     "price": 0, "daily": 0, "weekly": 0, "monthly": 0, "error": True
@@ -0,0 +1,248 @@
+import os
+import itertools
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from analysis_module import calculate_sma, calculate_rsi
+from backtest_module import COMMISSION_RATE, holding_state, crossovers, lump_sum_equity, dca_equity
+from strategies import get_smart_dca_multipliers
+
+# --- PARAMETRE TARAMASI (SWEEP) ---
+# Izgaradaki her kombinasyon backtest_module'ün dizi motoruyla değerlendirilir.
+# İndikatörler (her RSI / SMA penceresi) ana süreçte bir kez hesaplanır; işçi süreçler
+# bu salt-okunur dizileri başlangıçta bir kez alır ve sadece sinyal + özsermaye hesaplar.
+
+# Strateji -> varsayılan ızgara {parametre: [değerler]}
+DEFAULT_GRIDS = {
+    'RSI Stratejisi (30/70)': {"rsi_window": list(range(7, 29, 3)), "lower": list(range(20, 45, 5)), "upper": list(range(55, 85, 5))},
+    'SMA Cross (50/200)': {"fast": list(range(10, 110, 10)), "slow": list(range(100, 260, 20))},
+    'Smart DCA': {"dip_multiplier": [1.0, 1.25, 1.5, 2.0], "overbought_rsi": [70, 75, 80, 85], "overbought_multiplier": [0.25, 0.5, 0.75, 1.0]}
+}
+
+_MIN_PARALLEL_COMBOS = 200 # bunun altında süreç havuzu başlatmak taramadan pahalı
+_POOL_CHUNKS = 32 # ızgara bu kadar parçaya bölünür: dengeli yük, az IPC
+_shared = {} # işçi süreçteki salt-okunur diziler (bkz. _init_worker)
+
+def _combinations(strategy_name, grid):
+    """Valid parameter combinations of a grid as a list of dicts."""
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if strategy_name == 'RSI Stratejisi (30/70)':
+        combos = [c for c in combos if c["lower"] < c["upper"]]
+    elif strategy_name == 'SMA Cross (50/200)':
+        combos = [c for c in combos if c["fast"] < c["slow"]]
+    return combos
+
+def prepare_arrays(df, strategy_name, combos):
+    """
+    Precomputes every indicator the combinations need (once per distinct window).
+    Returns a dict of read-only NumPy arrays shared by all evaluations.
+    """
+    arrays = {
+        "price": df['Close'].to_numpy(dtype=float),
+        "month": df.index.month.to_numpy()
+    }
+    if strategy_name == 'RSI Stratejisi (30/70)':
+        for window in {c["rsi_window"] for c in combos}:
+            arrays[("rsi", window)] = calculate_rsi(df, window).to_numpy()
+    elif strategy_name == 'SMA Cross (50/200)':
+        for window in {c["fast"] for c in combos} | {c["slow"] for c in combos}:
+            arrays[("sma", window)] = calculate_sma(df, window).to_numpy()
+    elif strategy_name == 'Smart DCA':
+        arrays["sma200"] = calculate_sma(df, 200).to_numpy()
+        arrays["rsi"] = calculate_rsi(df).to_numpy()
+    return arrays
+
+def _window(arrays, bounds):
+    """Views of the arrays for rows [start, end) (no copy; indicators keep their full-history warm-up)."""
+    if bounds is None:
+        return arrays
+    start, end = bounds
+    return {key: values[start:end] for key, values in arrays.items()}
+
+def simulate(arrays, strategy_name, params, initial_capital=1000, monthly_dca=0, units=None):
+    """
+    Runs one parameter combination on precomputed arrays.
+    units: position carried over when continuing a run (e.g. the next walk-forward
+    window). The first bar of the arrays is then the previous window's last bar: it
+    only feeds the signals (crossovers, month change) and is not traded again.
+    'initial_capital' is the cash next to the carried position.
+    Returns (equity array, total invested, trade count, units held at the last bar).
+    """
+    lead = 0 if units is None else 1
+    carried = units or 0.0
+    price = arrays["price"][lead:]
+    if strategy_name == 'Smart DCA':
+        frame = pd.DataFrame({'Close': arrays["price"], 'SMA200': arrays["sma200"], 'RSI': arrays["rsi"]})
+        multiplier = get_smart_dca_multipliers(frame, **params)[lead:]
+        prev_month = arrays["month"][0] if lead else None
+        equity, total_invested, trade_count = dca_equity(arrays["month"][lead:], price, multiplier, initial_capital,
+                                                         monthly_dca, COMMISSION_RATE, prev_month, carried)
+        return equity, total_invested, trade_count, equity[-1] / price[-1]
+
+    if strategy_name == 'RSI Stratejisi (30/70)':
+        rsi = arrays[("rsi", params["rsi_window"])][lead:]
+        holding = holding_state(rsi < params["lower"], rsi > params["upper"], carried > 0)
+    else:
+        golden, death = crossovers(arrays[("sma", params["fast"])], arrays[("sma", params["slow"])])
+        holding = holding_state(golden[lead:], death[lead:], carried > 0)
+    equity, trade_count = lump_sum_equity(price, holding, initial_capital, COMMISSION_RATE, carried)
+    return equity, initial_capital, trade_count, equity[-1] / price[-1] if holding[-1] else 0.0
+
+def evaluate(arrays, strategy_name, params, initial_capital=1000, monthly_dca=0):
+    """
+    Metrics of one parameter combination (same definitions as run_backtest) plus max drawdown.
+    """
+    equity, total_invested, trade_count, _ = simulate(arrays, strategy_name, params, initial_capital, monthly_dca)
+    drawdown = (equity / np.maximum.accumulate(equity) - 1).min() * 100
+    return {
+        **params,
+        "total_invested": round(total_invested, 2),
+        "final_equity": round(equity[-1], 2),
+        "total_return_pct": round((equity[-1] / total_invested - 1) * 100, 2),
+        "max_drawdown_pct": round(drawdown, 2),
+        "trade_count": trade_count
+    }
+
+def _init_worker(arrays):
+    global _shared
+    _shared = arrays
+
+def _evaluate_chunk(combos, strategy_name, initial_capital, monthly_dca, bounds=None):
+    arrays = _window(_shared, bounds)
+    return [evaluate(arrays, strategy_name, params, initial_capital, monthly_dca) for params in combos]
+
+def _open_pool(arrays, combos, workers):
+    """Process pool whose workers hold 'arrays', or None when the grid is too small to benefit."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(combos) < _MIN_PARALLEL_COMBOS:
+        return None
+    try:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(arrays,))
+    except Exception as e:
+        print(f"Process pool unavailable, running serially: {e}")
+        return None
+
+def _evaluate_grid(pool, arrays, strategy_name, combos, initial_capital, monthly_dca, bounds=None):
+    """Metrics rows for every combination on rows 'bounds' of the arrays (in the pool when given)."""
+    if pool is not None:
+        size = -(-len(combos) // _POOL_CHUNKS)
+        chunks = [combos[i:i + size] for i in range(0, len(combos), size)]
+        task = partial(_evaluate_chunk, strategy_name=strategy_name, initial_capital=initial_capital,
+                       monthly_dca=monthly_dca, bounds=bounds)
+        try:
+            return [row for part in pool.map(task, chunks) for row in part]
+        except Exception as e:
+            print(f"Parallel sweep failed, running serially: {e}")
+    window = _window(arrays, bounds)
+    return [evaluate(window, strategy_name, params, initial_capital, monthly_dca) for params in combos]
+
+def _rank(rows, sort_by):
+    return pd.DataFrame(rows).sort_values(sort_by, ascending=False, kind="stable").reset_index(drop=True)
+
+def run_parameter_sweep(df, strategy_name, grid=None, initial_capital=1000, monthly_dca=0, sort_by="total_return_pct", workers=None):
+    """
+    Evaluates every combination of a parameter grid ({name: [values]}, defaults in
+    DEFAULT_GRIDS) for 'RSI Stratejisi (30/70)', 'SMA Cross (50/200)' or 'Smart DCA'
+    (which needs monthly_dca > 0: without new money every combination gives the same result).
+    Large grids are split into chunks over a process pool; the price and indicator
+    arrays are sent to each worker once.
+    Returns a DataFrame of parameters and metrics ranked by 'sort_by' (best first),
+    or an empty DataFrame when there is nothing to compare.
+    """
+    if df is None or df.empty or strategy_name not in DEFAULT_GRIDS:
+        return pd.DataFrame()
+    if strategy_name == 'Smart DCA' and monthly_dca <= 0:
+        return pd.DataFrame()
+
+    combos = _combinations(strategy_name, grid or DEFAULT_GRIDS[strategy_name])
+    if not combos:
+        return pd.DataFrame()
+    arrays = prepare_arrays(df, strategy_name, combos)
+
+    pool = _open_pool(arrays, combos, workers)
+    try:
+        rows = _evaluate_grid(pool, arrays, strategy_name, combos, initial_capital, monthly_dca)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return _rank(rows, sort_by)
+
+# --- WALK-FORWARD OPTİMİZASYON ---
+# Parametreler kayan bir örnek-içi (in-sample) pencerede seçilir ve sonraki örnek-dışı
+# (out-of-sample) pencerede işlem yapılır. İndikatörler tüm geçmiş için bir kez
+# hesaplanır; pencereler bu dizilerin görünümleridir (yeniden indirme/hesaplama yok).
+# Pozisyon ve nakit sonraki pencereye taşınır: pencere sınırında satış yapılmaz,
+# komisyon sadece gerçek bir sinyal değişiminde ödenir.
+
+def run_walk_forward(df, strategy_name, grid=None, train_bars=504, test_bars=126, initial_capital=1000,
+                     monthly_dca=0, sort_by="total_return_pct", workers=None):
+    """
+    Walk-forward optimization: for each step, the best combination on the last
+    'train_bars' rows (ranked by 'sort_by') trades the next 'test_bars' rows.
+    Returns {'metrics', 'windows' (DataFrame, one row per step), 'equity_curve'
+    (stitched out-of-sample curve with Strategy_Equity, Price, BuyHold_Equity)} or None
+    (also for 'Smart DCA' without monthly_dca, where no combination can be preferred).
+    """
+    if df is None or len(df) <= train_bars or strategy_name not in DEFAULT_GRIDS:
+        return None
+    if strategy_name == 'Smart DCA' and monthly_dca <= 0:
+        return None
+
+    combos = _combinations(strategy_name, grid or DEFAULT_GRIDS[strategy_name])
+    if not combos:
+        return None
+    arrays = prepare_arrays(df, strategy_name, combos)
+
+    capital, units = initial_capital, 0.0
+    total_invested = initial_capital
+    trade_count = 0
+    windows, curves = [], []
+
+    pool = _open_pool(arrays, combos, workers)
+    try:
+        for test_start in range(train_bars, len(df), test_bars):
+            train = (test_start - train_bars, test_start)
+            test = (test_start, min(test_start + test_bars, len(df)))
+            start_value = capital + units * arrays["price"][test_start - 1]
+
+            rows = _evaluate_grid(pool, arrays, strategy_name, combos, initial_capital, monthly_dca, train)
+            best = pd.Series([row[sort_by] for row in rows]).idxmax()
+            params = combos[best]
+
+            # Önceki barla birlikte: kesişim ve ay değişimi pencere sınırında doğru görülür
+            equity, invested, trades, units = simulate(_window(arrays, (test_start - 1, test[1])), strategy_name,
+                                                       params, capital, monthly_dca, units)
+            total_invested += invested - capital
+            trade_count += trades
+            curves.append(equity)
+
+            windows.append({
+                "train_start": df.index[train[0]], "test_start": df.index[test[0]], "test_end": df.index[test[1] - 1],
+                **params,
+                "in_sample_return_pct": rows[best]["total_return_pct"],
+                "out_of_sample_return_pct": round((equity[-1] / (start_value + invested - capital) - 1) * 100, 2)
+            })
+
+            capital = 0.0 if units else equity[-1]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    oos = df.iloc[train_bars:]
+    equity_curve = pd.DataFrame(index=oos.index)
+    equity_curve['Strategy_Equity'] = np.concatenate(curves)
+    equity_curve['Price'] = oos['Close']
+    equity_curve['BuyHold_Equity'] = (oos['Close'] / oos['Close'].iloc[0]) * initial_capital * (1 - COMMISSION_RATE)
+
+    final_equity = equity_curve['Strategy_Equity'].iloc[-1]
+    metrics = {
+        "initial_capital": initial_capital,
+        "total_invested": round(total_invested, 2),
+        "final_equity": round(final_equity, 2),
+        "total_return_pct": round((final_equity / total_invested - 1) * 100, 2),
+        "trade_count": trade_count,
+        "strategy_name": strategy_name
+    }
+    return {"metrics": metrics, "windows": pd.DataFrame(windows), "equity_curve": equity_curve}
@@ -1,8 +1,9 @@
 import sqlite3
 import pandas as pd
 from datetime import datetime
-import yfinance as yf
-from analysis_module import get_technical_signals
+from data_provider import fetch_history, refresh_prices
+from symbol_resolver import resolve_symbols
+from analysis_module import get_universe_signals, get_stored_signals
 import config
 
 DB_PATH = "finance.db"
@@ -79,19 +80,29 @@ def run_paper_bot(symbols, force_trade=False):
     open_pos = get_open_paper_positions()
     
     with st.status("🔍 Piyasa Taranıyor (Best-Pick Modu)...", expanded=True) as status:
+        listings = resolve_symbols(symbols, market="BIST")
+        yf_map = {sym: listings[sym.upper()]['ticker'] if sym.upper() in listings else sym for sym in symbols}
+        st.write(f"📥 {len(symbols)} sembolün verisi tek seferde indiriliyor...")
+        tickers = list(dict.fromkeys(yf_map.values()))
+        transient = refresh_prices(tickers, period="1y")
+        
+        # Puanlar akan indikatör durumlarından (geçmiş yeniden taranmaz); depoya yazılmayan
+        # yedek kaynak barları olan semboller geçmişle, tek vektörel geçişte puanlanır
+        signals = get_stored_signals([t for t in tickers if t not in transient])
+        if transient:
+            prices = fetch_history(list(transient), period="1y")
+            closes = prices["Close"].ffill().iloc[-1] if not prices.empty else {}
+            for ticker, signal in get_universe_signals(prices).items():
+                signals[ticker] = {**signal, "price": closes[ticker]}
+        
         for sym in symbols:
             try:
-                st.write(f"⏳ **{sym}** analiz ediliyor...")
-                yf_sym = sym if "." in sym or "-" in sym else sym + ".IS"
-                hist = yf.Ticker(yf_sym).history(period="1y")
-                
-                if hist.empty:
+                if yf_map[sym] not in signals:
                     st.write(f"⚠️ {sym} verisi çekilemedi.")
                     continue
                 
-                signal = get_technical_signals(hist)
-                score = signal['score']
-                price = hist['Close'].iloc[-1]
+                score = signals[yf_map[sym]]['score']
+                price = signals[yf_map[sym]]['price']
                 
                 scanned_results.append({
                     "symbol": sym,
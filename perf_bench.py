@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import inspect
+import argparse
+import tempfile
+import config
+import provider_module
+import fx_service
+from database import init_db
+
+# --- PERFORMANS ÖLÇÜMÜ (RECORD / REPLAY) ---
+# Kullanım:
+#   python perf_bench.py --mode record               # ağdan çeker, fixtures/ altına kaydeder
+#   python perf_bench.py --mode replay --latency 0.2 # ağsız, kayıtlı cevaplarla ölçer
+# Her çalıştırma boş bir geçici dizinde (soğuk DB / önbellek) yapılır ki sonuçlar tekrarlanabilir olsun.
+
+BACKTEST_SYMBOL = "AAPL"
+BACKTEST_CASES = [
+    ("RSI Stratejisi (30/70)", 0),
+    ("Al ve Tut", 0),
+    ("Al ve Tut", 1000),
+    ("Smart DCA", 1000)
+]
+
+def _timed(name, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        func(*args, **kwargs)
+        status = "ok"
+    except Exception as e:
+        status = f"error: {e}"
+    elapsed = time.perf_counter() - start
+    print(f"{name:<45} {elapsed:8.3f}s  {status}")
+    return elapsed
+
+def run_benchmarks():
+    # st.cache_data / disk_cached katmanları atlanır: her ölçüm gerçek işi yapar
+    from mail_module import fetch_newsletter_data
+    from screener_module import fetch_bist_data
+    from fund_module import fetch_tefas_data
+    from backtest_module import run_backtest, run_periodic_backtest
+    from data_provider import fetch_symbol_history
+
+    _timed("fetch_newsletter_data", inspect.unwrap(fetch_newsletter_data))
+    _timed("fetch_bist_data", inspect.unwrap(fetch_bist_data))
+    _timed("fetch_tefas_data", inspect.unwrap(fetch_tefas_data))
+
+    df = fetch_symbol_history(BACKTEST_SYMBOL, period="5y")
+    for strategy, dca in BACKTEST_CASES:
+        _timed(f"run_backtest {strategy} (dca={dca})", run_backtest, df, strategy, 1000, dca)
+    _timed("run_periodic_backtest RSI", run_periodic_backtest, df, "RSI Stratejisi (30/70)", 1000)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the data-heavy entry points.")
+    parser.add_argument("--mode", choices=[provider_module.RECORD, provider_module.REPLAY], default=provider_module.REPLAY)
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected latency per replayed call (s)")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    # Geçici dizine geçmeden önce yollar mutlak yapılır
+    config.PROVIDER_FIXTURE_DIR = os.path.abspath(config.PROVIDER_FIXTURE_DIR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    provider_module.set_mode(args.mode, latency=args.latency)
+
+    for run in range(args.repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            init_db()
+            fx_service._cache.clear()
+            print(f"--- Run {run + 1}/{args.repeat} ({args.mode}, latency={args.latency}s) ---")
+            run_benchmarks()
+
+    print("--- Upstream stats ---")
+    for source, stats in provider_module.get_upstream_stats().items():
+        print(f"{source:<15} {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import config
+import fx_service
+from price_archive import scan_archives
+from symbol_resolver import resolve_symbols
+from rebalance_module import calculate_rebalance
+from backtest_module import COMMISSION_RATE
+
+# --- ÇOK VARLIKLI PORTFÖY BACKTESTİ ---
+# Hedef dağılım (config.PORTFOLIO_TARGETS) kategori temsilcisi sembollerle
+# (config.PORTFOLIO_BACKTEST_SYMBOLS) hizalanmış bir fiyat matrisi üzerinde simüle edilir.
+# Dengeleme günlerinde yeni para calculate_rebalance ile dağıtılır; iki dengeleme
+# arasında adetler sabittir ve dönemin tüm değerleri tek matris çarpımıyla bulunur.
+
+# Arayüz etiketi -> pandas dönem kodu
+REBALANCE_FREQUENCIES = {"Aylık": "M", "Çeyreklik": "Q", "Yıllık": "Y"}
+
+# Dengeleme yöntemleri:
+#   new_money: sadece yeni para hedeften geride kalanlara (calculate_rebalance, satış yok)
+#   full:      fazla ağırlıklı varlıklar satılır, gelir + yeni para calculate_rebalance ile alınır
+#   none:      yeni para kaymaya bakılmadan hedef yüzdelerle bölünür (dengelemesiz kıyas)
+REBALANCE_MODES = ["new_money", "full", "none"]
+
+def get_target_weights():
+    """
+    {symbol: target %} from config.PORTFOLIO_TARGETS via the category proxies in
+    config.PORTFOLIO_BACKTEST_SYMBOLS. Non-numeric entries (e.g. 'Sasa': 'SASA.IS')
+    and categories without a proxy symbol are skipped.
+    """
+    weights = {}
+    for category, pct in config.PORTFOLIO_TARGETS.items():
+        symbol = config.PORTFOLIO_BACKTEST_SYMBOLS.get(category)
+        if symbol and isinstance(pct, (int, float)) and pct > 0:
+            weights[symbol] = weights.get(symbol, 0) + pct
+    return weights
+
+def normalize_weights(weights, symbols=None):
+    """Target percentages scaled to sum to 100 (over 'symbols' only, when given)."""
+    symbols = list(weights) if symbols is None else [s for s in symbols if s in weights]
+    total_pct = sum(weights[s] for s in symbols)
+    return {s: weights[s] * 100 / total_pct for s in symbols} if total_pct else {}
+
+def load_price_matrix(symbols, period="5y"):
+    """
+    Aligned (dates x symbols) Close matrix in TRY, read through the mmap archives.
+    Non-TRY listings are converted with the shared FX history; holidays are
+    forward-filled and dates before every symbol has a price are dropped.
+    """
+    prices = scan_archives(symbols, field="Close", period=period)
+    if prices.empty:
+        return prices
+
+    listings = resolve_symbols(list(prices.columns))
+    for sym in prices.columns:
+        listing = listings.get(sym.upper())
+        currency = listing['currency'] if listing else "TRY"
+        if currency != "TRY":
+            fx_history = fx_service.get_history(currency, period=period)
+            if fx_history.empty:
+                print(f"No {currency}/TRY history, {sym} left in {currency}")
+                continue
+            prices[sym] = prices[sym] * fx_history.reindex(prices.index).ffill()
+    return prices.sort_index().ffill().dropna()
+
+def _period_starts(index, frequency):
+    """Row numbers of the first trading day of each rebalance period."""
+    periods = index.to_period(frequency)
+    return np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+
+def simulate_portfolio(prices, weights, frequency="M", initial_capital=10000, contribution=0, rebalance="new_money"):
+    """
+    Simulates a target allocation on an aligned price matrix.
+    weights: {symbol: target %} (normalized to 100), frequency: pandas period code
+    ('M', 'Q', 'Y'), contribution: new money added on every rebalance date,
+    rebalance: one of REBALANCE_MODES.
+    Returns (equity Series, weights DataFrame, total invested, trade count).
+    """
+    targets = normalize_weights(weights, [s for s in weights if s in prices.columns])
+    symbols = list(targets)
+    matrix = prices[symbols].to_numpy(dtype=float)
+
+    starts = _period_starts(prices.index, frequency)
+    ends = np.r_[starts[1:], len(matrix)]
+    units = np.zeros(len(symbols))
+    values = np.empty_like(matrix)
+    total_invested = initial_capital
+    trade_count = 0
+
+    for k, (start, end) in enumerate(zip(starts, ends)):
+        price = matrix[start]
+        cash = initial_capital if k == 0 else contribution
+        if k > 0:
+            total_invested += contribution
+
+        current = units * price
+        if rebalance == "full" and k > 0:
+            # Hedefin üstündeki kısım satılır (komisyonlu), gelir alımlara eklenir
+            future_total = current.sum() + cash
+            excess = np.maximum(0, current - np.array([targets[s] for s in symbols]) / 100 * future_total)
+            units -= excess / price
+            cash += (excess * (1 - COMMISSION_RATE)).sum()
+            trade_count += int((excess > 0).sum())
+            current = units * price
+
+        if cash > 0:
+            holdings = dict(zip(symbols, current)) if rebalance != "none" else {}
+            buys = calculate_rebalance(cash, holdings, targets)
+            amounts = np.array([buys[s] for s in symbols])
+            units += amounts / (price * (1 + COMMISSION_RATE))
+            trade_count += int((amounts > 0).sum())
+
+        # Dönem boyunca adetler sabit: tüm günlerin değerleri tek seferde
+        values[start:end] = units * matrix[start:end]
+
+    equity = values.sum(axis=1)
+    weight_frame = pd.DataFrame(values / equity[:, None] * 100, index=prices.index, columns=symbols)
+    return pd.Series(equity, index=prices.index), weight_frame, total_invested, trade_count
+
+def run_portfolio_backtest(weights=None, frequency="M", period="5y", initial_capital=10000, contribution=0, rebalance="new_money"):
+    """
+    Backtests a target allocation ({symbol: target %}, default get_target_weights())
+    with periodic rebalancing. The benchmark (BuyHold_Equity) receives the same
+    money split by the target percentages without ever rebalancing.
+    Returns {'metrics', 'equity_curve', 'weights'} or None when prices are missing.
+    """
+    weights = weights or get_target_weights()
+    prices = load_price_matrix(list(weights), period=period)
+    if prices.empty or len(prices) < 2:
+        return None
+
+    equity, weight_frame, total_invested, trade_count = simulate_portfolio(prices, weights, frequency, initial_capital, contribution, rebalance)
+    benchmark, _, _, _ = simulate_portfolio(prices, weights, frequency, initial_capital, contribution, "none")
+
+    result_df = pd.DataFrame(index=prices.index)
+    result_df['Strategy_Equity'] = equity
+    result_df['BuyHold_Equity'] = benchmark
+
+    final_equity = equity.iloc[-1]
+    metrics = {
+        "initial_capital": initial_capital,
+        "total_invested": round(total_invested, 2),
+        "final_equity": round(final_equity, 2),
+        "total_return_pct": round(((final_equity / total_invested) - 1) * 100, 2),
+        "benchmark_return_pct": round(((benchmark.iloc[-1] / total_invested) - 1) * 100, 2),
+        "trade_count": trade_count,
+        "strategy_name": f"Portföy ({rebalance}, {frequency})"
+    }
+    return {"metrics": metrics, "equity_curve": result_df, "weights": weight_frame}
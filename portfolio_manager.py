@@ -1,7 +1,10 @@
 import sqlite3
 import pandas as pd
-import yfinance as yf
 import config
+from data_provider import fetch_history, get_symbol_history
+import fx_service
+from cache_module import disk_cached
+from symbol_resolver import resolve_symbol, resolve_symbols
 
 DB_PATH = "finance.db"
 
@@ -35,45 +38,22 @@ def get_real_time_price(symbol):
     Returns: (price_tl, conversion_rate)
     """
     try:
-        # 1. Get USD/TRY Rate
-        try:
-            usd_curr = yf.Ticker("TRY=X").history(period="1d")
-            if not usd_curr.empty:
-                usd_try = usd_curr['Close'].iloc[-1]
-            else:
-                usd_try = 35.0 # Fallback
-        except:
-            usd_try = 35.0
-
-        # 2. Smart Fetch Logic
-        candidates = [symbol]
-        if "." not in symbol and "-" not in symbol:
-             candidates.append(symbol + ".IS")
-             
-        ticker = None
-        data = None
-        final_symbol = symbol
-        
-        for cand in candidates:
-            try:
-                t = yf.Ticker(cand)
-                h = t.history(period="1d")
-                if not h.empty:
-                    data = h['Close'].iloc[-1]
-                    final_symbol = cand
-                    break
-            except:
-                continue
+        # 1. Resolve ticker & quote currency (persisted, no probe requests after first time)
+        listing = resolve_symbol(symbol)
+        if listing is None:
+            return None, 1.0
         
-        if data is None:
+        # 2. Price (local store, delta fetch)
+        hist = get_symbol_history(fetch_history([listing['ticker']], period="5d"), listing['ticker'])
+        if hist.empty:
             return None, 1.0
+        data = hist['Close'].iloc[-1]
 
         # 3. Currency Logic
-        if final_symbol.endswith(".IS"):
+        if listing['currency'] == "TRY":
             return data, 1.0
-        else:
-            # Assume Foreign (Default USD)
-            return data * usd_try, usd_try
+        rate = fx_service.get_rate(listing['currency'])
+        return data * rate, rate
             
     except Exception as e:
         print(f"Price fetch error for {symbol}: {e}")
@@ -89,6 +69,10 @@ def get_portfolio_balance(user_email):
 
     summary = []
     symbols = df['symbol'].unique()
+    
+    # Resolve all symbols and warm their prices in one batch before the per-holding loop
+    listings = resolve_symbols(symbols)
+    fetch_history([l['ticker'] for l in listings.values()], period="5d")
 
     for sym in symbols:
         sym_df = df[df['symbol'] == sym].sort_values('date')
@@ -158,6 +142,7 @@ def get_portfolio_by_category(user_email):
         
     return category_totals
 
+@disk_cached(ttl=3600)
 def get_benchmark_data(period="1y", custom_ticker=None):
     """
     Fetches historical data for benchmarks: BIST 100, USD/TRY, Gold (Gram/Ons), Bitcoin.
@@ -176,17 +161,16 @@ def get_benchmark_data(period="1y", custom_ticker=None):
         benchmarks[f"Rakip: {custom_ticker.upper()}"] = custom_ticker.upper()
     
     df_list = []
+    prices = fetch_history(list(benchmarks.values()), period=period)
     
     for name, sym in benchmarks.items():
         try:
-            hist = yf.Ticker(sym).history(period=period)['Close']
-            if hist.empty:
+            sym_hist = get_symbol_history(prices, sym)
+            if sym_hist.empty:
                 print(f"Benchmark warning: No data for {sym}")
                 continue
                 
-            # Adjust timezone
-            if hist.index.tz is not None:
-                hist.index = hist.index.tz_localize(None)
+            hist = sym_hist['Close']
             hist.name = name
             df_list.append(hist)
         except Exception as e:
@@ -207,42 +191,35 @@ def get_portfolio_history(holdings, period="1y"):
         return pd.Series()
         
     total_series = None
-    usd_rate_history = None
     
-    # Pre-fetch USD history if needed for conversion
-    # We'll fetch it once to reuse
-    try:
-        usd_rate_history = yf.Ticker("TRY=X").history(period=period)['Close']
-        if usd_rate_history.index.tz is not None:
-            usd_rate_history.index = usd_rate_history.index.tz_localize(None)
-    except:
-        pass
+    # Determine tickers (persisted resolver: exchange + quote currency)
+    listings = resolve_symbols([h['symbol'] for h in holdings], market="BIST")
+    
+    # All holdings in one batched request, FX history from the shared FX service
+    prices = fetch_history([l['ticker'] for l in listings.values()], period=period)
+    fx_histories = {}
         
     for h in holdings:
         sym = h['symbol']
         qty = h['quantity']
-        
-        # Determine ticker
-        ticker_sym = sym
-        if "." not in sym and "-" not in sym:
-             ticker_sym = sym + ".IS" # Fallback/Assumption
+        listing = listings.get(sym.upper())
+        if listing is None: continue
         
         try:
-            hist = yf.Ticker(ticker_sym).history(period=period)['Close']
-            if hist.empty: continue
-            
-            if hist.index.tz is not None:
-                hist.index = hist.index.tz_localize(None)
+            sym_hist = get_symbol_history(prices, listing['ticker'])
+            if sym_hist.empty: continue
+            hist = sym_hist['Close']
                 
-            # Currency Conversion
-            # Logic: If name ends with .IS, it is TL. Else USD.
-            # This is a simplification.
-            is_tl = ticker_sym.endswith(".IS")
+            # Currency Conversion (quote currency from resolver)
+            currency = listing['currency']
+            if currency != "TRY" and currency not in fx_histories:
+                fx_histories[currency] = fx_service.get_history(currency, period=period)
+            fx_history = fx_histories.get(currency)
             
-            if not is_tl and usd_rate_history is not None:
+            if currency != "TRY" and fx_history is not None and not fx_history.empty:
                 # Align dates
-                aligned_usd = usd_rate_history.reindex(hist.index).ffill()
-                val_history = hist * qty * aligned_usd
+                aligned_fx = fx_history.reindex(hist.index).ffill()
+                val_history = hist * qty * aligned_fx
             else:
                 val_history = hist * qty
                 
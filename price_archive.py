@@ -0,0 +1,133 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import config
+import price_store
+from data_provider import fetch_history, period_to_start_date
+
+# --- BELLEK EŞLEMELİ (MMAP) SÜTUNSAL FİYAT ARŞİVİ ---
+# Sembol başına tek dosya:
+#   [magic 8B][n int64][covered_from int64 ns]
+#   [date int64 ns x n]
+#   [Open float64 x n][High x n][Low x n][Close x n][Volume x n]
+# Float sütunlar tek (5, n) blok halinde tutulur; okuyucu kopyalamadan görünüm alır.
+
+MAGIC = b"FBARCH01"
+HEADER_SIZE = 24
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+def _archive_path(symbol):
+    safe = symbol.replace("/", "_").replace("=", "_").replace("^", "_")
+    return os.path.join(config.PRICE_ARCHIVE_DIR, f"{safe}.bin")
+
+def write_archive(symbol, hist, covered_from=None):
+    """
+    Writes a symbol's OHLCV frame to its columnar archive file (atomically).
+    covered_from: YYYY-MM-DD the history is known to be complete from.
+    """
+    if hist is None or hist.empty:
+        return
+
+    os.makedirs(config.PRICE_ARCHIVE_DIR, exist_ok=True)
+    n = len(hist)
+    dates = hist.index.values.astype("datetime64[ns]").view(np.int64)
+    block = np.vstack([hist[f].to_numpy(dtype=np.float64, na_value=np.nan) if f in hist.columns
+                       else np.full(n, np.nan) for f in FIELDS])
+    start_ns = pd.Timestamp(covered_from or hist.index[0]).value
+
+    path = _archive_path(symbol)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([n, start_ns], dtype=np.int64).tobytes())
+        f.write(np.ascontiguousarray(dates).tobytes())
+        f.write(np.ascontiguousarray(block).tobytes())
+    os.replace(tmp_path, path)
+
+def open_archive(symbol):
+    """
+    Maps a symbol's archive without reading it.
+    Returns {'covered_from': Timestamp, 'date': int64 ns array, 'block': (5, n) float64 array}
+    where the arrays are read-only memmap views, or None if there is no archive.
+    """
+    path = _archive_path(symbol)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        if f.read(8) != MAGIC:
+            return None
+    header = np.memmap(path, dtype=np.int64, mode="r", offset=8, shape=(2,))
+    n, start_ns = int(header[0]), int(header[1])
+    if n == 0:
+        return None
+
+    dates = np.memmap(path, dtype=np.int64, mode="r", offset=HEADER_SIZE, shape=(n,))
+    block = np.memmap(path, dtype=np.float64, mode="r", offset=HEADER_SIZE + 8 * n, shape=(len(FIELDS), n))
+    return {"covered_from": pd.Timestamp(start_ns), "date": dates, "block": block}
+
+def archive_frame(archive, start=None):
+    """
+    Wraps a mapped archive in a pandas DataFrame (Open..Volume) without copying
+    the price columns. 'start' (YYYY-MM-DD) slices from that date on.
+    """
+    dates = archive["date"]
+    first = 0
+    if start:
+        first = int(np.searchsorted(dates, pd.Timestamp(start).value))
+
+    index = pd.DatetimeIndex(np.asarray(dates[first:]).view("datetime64[ns]"))
+    return pd.DataFrame(archive["block"][:, first:].T, index=index, columns=FIELDS, copy=False)
+
+def _is_fresh(symbol, period_start):
+    """True if the archive covers period_start and was rebuilt within the store refresh window."""
+    path = _archive_path(symbol)
+    if not os.path.exists(path):
+        return False
+    if time.time() - os.path.getmtime(path) > config.PRICE_STORE_REFRESH_MINUTES * 60:
+        return False
+    archive = open_archive(symbol)
+    return archive is not None and archive["covered_from"] <= pd.Timestamp(period_start)
+
+def refresh_archives(symbols, period="5y"):
+    """
+    Brings the price store up to date for 'symbols' (one batched delta fetch) and
+    rebuilds the archive files of symbols whose archives are stale.
+    """
+    period_start = period_to_start_date(period)
+    stale = [s for s in symbols if not _is_fresh(s, period_start)]
+    if not stale:
+        return
+
+    fetch_history(stale, period=period)
+    for sym in stale:
+        coverage = price_store.get_coverage(sym)
+        hist = price_store.load_prices(sym)
+        write_archive(sym, hist, covered_from=coverage["covered_from"] if coverage else None)
+
+def get_archive_history(symbol, period="5y"):
+    """
+    Returns a symbol's OHLCV frame for 'period' backed by the mmap archive.
+    Warm calls touch neither the network nor SQLite.
+    """
+    refresh_archives([symbol], period=period)
+    archive = open_archive(symbol)
+    if archive is None:
+        return pd.DataFrame()
+    return archive_frame(archive, start=period_to_start_date(period))
+
+def scan_archives(symbols, field="Close", period="5y"):
+    """
+    Returns a (dates x symbols) frame of one field for many symbols, read through
+    the mmap archives. Intended for sweeps and universe-wide scans.
+    """
+    refresh_archives(symbols, period=period)
+    start = period_to_start_date(period)
+    series = {}
+    for sym in symbols:
+        archive = open_archive(sym)
+        if archive is None:
+            continue
+        series[sym] = archive_frame(archive, start=start)[field]
+    return pd.DataFrame(series)
@@ -0,0 +1,129 @@
+import sqlite3
+import pandas as pd
+from datetime import datetime
+from database import DB_NAME, create_price_tables
+
+# --- YEREL FİYAT DEPOSU (OHLCV) ---
+# 'prices' tablosu (symbol, date) anahtarlı günlük barları tutar.
+
+COLUMN_MAP = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+_schema_ready = False
+
+def _connect():
+    """Opens a connection and makes sure the store tables exist (once per process)."""
+    global _schema_ready
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    if not _schema_ready:
+        create_price_tables(conn.cursor())
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+def save_prices(symbol, hist, covered_from=None):
+    """
+    Upserts daily OHLCV bars for a symbol and stamps its coverage metadata.
+    covered_from: first date (YYYY-MM-DD) the stored history is known to be complete from.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if hist is None or hist.empty:
+        # Başarısız indirme: ne kapsam ne kontrol zamanı yazılır, sembol yeniden denenir
+        return
+
+    rows = []
+    for date, bar in hist.iterrows():
+        rows.append((
+            symbol,
+            date.strftime("%Y-%m-%d"),
+            *[None if pd.isna(bar.get(col)) else float(bar.get(col)) for col in COLUMN_MAP]
+        ))
+
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT OR REPLACE INTO prices (symbol, date, open, high, low, close, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [r for r in rows if r[5] is not None])
+
+    if covered_from:
+        cursor.execute('''
+            INSERT INTO price_coverage (symbol, covered_from, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET
+                covered_from = MIN(covered_from, excluded.covered_from),
+                updated_at = excluded.updated_at
+        ''', (symbol, covered_from, now))
+    else:
+        cursor.execute("UPDATE price_coverage SET updated_at = ? WHERE symbol = ?", (now, symbol))
+    conn.commit()
+    conn.close()
+
+def load_prices(symbol, start=None):
+    """
+    Returns stored OHLCV bars for a symbol (optionally from 'start' on) as a
+    DataFrame indexed by date with Open/High/Low/Close/Volume columns.
+    """
+    conn = _connect()
+    query = "SELECT date, open, high, low, close, volume FROM prices WHERE symbol = ?"
+    params = [symbol]
+    if start:
+        query += " AND date >= ?"
+        params.append(start)
+    df = pd.read_sql_query(query + " ORDER BY date", conn, params=params)
+    conn.close()
+
+    if df.empty:
+        return pd.DataFrame()
+
+    df.index = pd.to_datetime(df.pop("date"))
+    df.index.name = None
+    return df.rename(columns={v: k for k, v in COLUMN_MAP.items()})
+
+def get_coverage(symbol):
+    """Returns {'covered_from': str, 'updated_at': datetime} or None if never stored."""
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT covered_from, updated_at FROM price_coverage WHERE symbol = ?", (symbol,))
+    res = cursor.fetchone()
+    conn.close()
+    if not res:
+        return None
+    return {"covered_from": res[0], "updated_at": datetime.strptime(res[1], "%Y-%m-%d %H:%M:%S")}
+
+def get_resume_date(symbol):
+    """
+    Returns the date to resume delta fetching from: the second-to-last stored bar.
+    Re-fetching one completed bar lets the caller detect split/dividend re-adjustments;
+    the last bar may still be an intraday partial and is always overwritten.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT date FROM prices WHERE symbol = ? ORDER BY date DESC LIMIT 2", (symbol,))
+    dates = [r[0] for r in cursor.fetchall()]
+    conn.close()
+    return dates[-1] if dates else None
+
+def matches_stored(symbol, hist, tolerance=0.01):
+    """
+    Checks the first bar of a freshly fetched delta against the stored close.
+    A mismatch means upstream re-adjusted history and the symbol needs a full reload.
+    """
+    if hist is None or hist.empty:
+        return True
+    first_date = hist.index[0].strftime("%Y-%m-%d")
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT close FROM prices WHERE symbol = ? AND date = ?", (symbol, first_date))
+    res = cursor.fetchone()
+    conn.close()
+    if not res or not res[0]:
+        return True
+    return abs(hist['Close'].iloc[0] / res[0] - 1) <= tolerance
+
+def clear_symbol(symbol):
+    """Drops all stored bars and coverage for a symbol."""
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM prices WHERE symbol = ?", (symbol,))
+    cursor.execute("DELETE FROM price_coverage WHERE symbol = ?", (symbol,))
+    conn.commit()
+    conn.close()
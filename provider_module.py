@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import pickle
+import random
+import hashlib
+import threading
+from datetime import datetime
+import config
+from deadline_module import remaining
+
+# --- VERİ KAYNAĞI SOYUTLAMASI (LIVE / RECORD / REPLAY) ---
+# Tüm dış çağrılar (yfinance, borsapy, etf.com, investing.com, GitHub) provider_call
+# üzerinden geçer:
+#   live   -> doğrudan kaynağa gider (varsayılan)
+#   record -> kaynağa gider ve cevabı fixtures/ altına kaydeder
+#   replay -> ağa hiç çıkmaz, kayıtlı cevabı (isteğe bağlı gecikmeyle) döner
+# Mod: FINANCE_BOT_PROVIDER_MODE ortam değişkeni veya set_mode().
+#
+# Canlı çağrılar (live/record) ayrıca kaynak başına korunur:
+#   token kovası (hız sınırı) -> jitter'lı üstel tekrar deneme -> devre kesici
+# Sayaçlar get_upstream_stats() ile okunur.
+
+LIVE, RECORD, REPLAY = "live", "record", "replay"
+
+_mode = os.environ.get("FINANCE_BOT_PROVIDER_MODE", LIVE).lower()
+_latency = float(os.environ.get("FINANCE_BOT_REPLAY_LATENCY", "0") or 0)
+_recorded_at = None
+_manifest_lock = threading.Lock()
+
+class ReplayMissError(LookupError):
+    """Raised in replay mode when no fixture was recorded for a call."""
+
+class UpstreamThrottledError(ConnectionError):
+    """Raised when an upstream answers with a rate-limit / server error instead of data."""
+
+class CircuitOpenError(RuntimeError):
+    """Raised without contacting the upstream while its circuit breaker is open."""
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class _TokenBucket:
+    """Blocking token bucket: 'rate' requests per second with bursts up to 'capacity'."""
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, sleeping until one is available. Returns the time waited (s)."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class _CircuitBreaker:
+    """
+    closed -> (CIRCUIT_FAILURE_THRESHOLD consecutive transient failures) -> open
+    open -> (CIRCUIT_COOLDOWN_SECONDS) -> half-open: one trial call decides open/closed
+    """
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= config.CIRCUIT_COOLDOWN_SECONDS:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        """Returns True if this failure tripped (re-opened) the breaker."""
+        with self.lock:
+            self.failures += 1
+            was_trial = self.trial_running
+            self.trial_running = False
+            if was_trial or (self.opened_at is None and self.failures >= config.CIRCUIT_FAILURE_THRESHOLD):
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+_guards = {}
+_guards_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+def _count(stats, name, amount=1):
+    with _stats_lock:
+        stats[name] += amount
+
+def _guard(source):
+    """Returns (bucket, breaker, stats) for a source, creating them on first use."""
+    with _guards_lock:
+        if source not in _guards:
+            rate, capacity = config.UPSTREAM_RATE_LIMITS.get(source, config.UPSTREAM_DEFAULT_RATE_LIMIT)
+            stats = {"calls": 0, "successes": 0, "failures": 0, "retries": 0,
+                     "trips": 0, "rejected": 0, "throttle_wait": 0.0}
+            _guards[source] = (_TokenBucket(rate, capacity), _CircuitBreaker(), stats)
+        return _guards[source]
+
+def get_upstream_stats():
+    """
+    Returns per-source counters: {source: {'state', 'calls', 'successes', 'failures',
+    'retries', 'trips', 'rejected', 'throttle_wait'}}. Rising retries/trips mean
+    a source is degrading.
+    """
+    with _guards_lock:
+        guards = dict(_guards)
+    with _stats_lock:
+        return {source: {"state": breaker.state, **stats} for source, (_, breaker, stats) in guards.items()}
+
+def _is_transient(error):
+    """Network errors, rate limits and 5xx answers are retried; everything else is not."""
+    if isinstance(error, (OSError, UpstreamThrottledError)):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return "ratelimit" in text or "too many requests" in text or "429" in text
+
+def _check_response(value):
+    status = getattr(value, "status_code", None)
+    if status in RETRY_STATUS_CODES:
+        raise UpstreamThrottledError(f"HTTP {status}")
+    return value
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff delay for the given retry attempt (1-based)."""
+    ceiling = min(config.UPSTREAM_BACKOFF_MAX, config.UPSTREAM_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+def _guarded_call(source, key, fn):
+    """Runs fn under the source's rate limit, retry policy and circuit breaker."""
+    bucket, breaker, stats = _guard(source)
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            _count(stats, "rejected")
+            raise CircuitOpenError(f"{source} circuit open, skipping {key!r}")
+
+        _count(stats, "throttle_wait", bucket.acquire())
+        _count(stats, "calls")
+        try:
+            value = _check_response(fn())
+        except Exception as e:
+            if not _is_transient(e):
+                # Kalıcı hata (bilinmeyen sembol vb.): kaynak sağlıklı sayılır
+                breaker.record_success()
+                raise
+            _count(stats, "failures")
+            if breaker.record_failure():
+                _count(stats, "trips")
+                print(f"Upstream circuit opened: {source} ({e})")
+                raise
+            attempt += 1
+            if attempt > config.UPSTREAM_MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            left = remaining()
+            if left is not None and delay >= left:
+                raise # Sayfa bütçesi bir tekrar denemeye daha yetmiyor
+            _count(stats, "retries")
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        _count(stats, "successes")
+        return value
+
+def set_mode(mode, latency=None):
+    """Switches the provider mode at runtime (live/record/replay) and the replay latency (s)."""
+    global _mode, _latency, _recorded_at
+    if mode not in (LIVE, RECORD, REPLAY):
+        raise ValueError(f"Unknown provider mode: {mode}")
+    _mode = mode
+    _recorded_at = None
+    if latency is not None:
+        _latency = latency
+
+def get_mode():
+    return _mode
+
+def _fixture_path(source, key):
+    key_hash = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(config.PROVIDER_FIXTURE_DIR, source, f"{key_hash}.pkl")
+
+def _manifest_path():
+    return os.path.join(config.PROVIDER_FIXTURE_DIR, "manifest.json")
+
+def now():
+    """
+    Current time for date-window calculations. In replay mode this is the
+    recording time, so '5d'/'1y' windows select the same bars on any day.
+    """
+    global _recorded_at
+    if _mode == LIVE:
+        return datetime.now()
+
+    with _manifest_lock:
+        if _recorded_at is None:
+            if _mode == REPLAY and os.path.exists(_manifest_path()):
+                with open(_manifest_path()) as f:
+                    _recorded_at = datetime.fromisoformat(json.load(f)["recorded_at"])
+            else:
+                _recorded_at = datetime.now()
+                if _mode == RECORD:
+                    os.makedirs(config.PROVIDER_FIXTURE_DIR, exist_ok=True)
+                    with open(_manifest_path(), "w") as f:
+                        json.dump({"recorded_at": _recorded_at.isoformat()}, f)
+    return _recorded_at
+
+def _record(source, key, outcome):
+    path = _fixture_path(source, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(path, "wb") as f:
+            pickle.dump({"key": repr(key), "outcome": outcome}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        print(f"Fixture record error ({source} {key}): {e}")
+
+def _replay(source, key):
+    path = _fixture_path(source, key)
+    if not os.path.exists(path):
+        raise ReplayMissError(f"No fixture for {source} {key!r}")
+    with open(path, "rb") as f:
+        outcome = pickle.load(f)["outcome"]
+    if _latency > 0:
+        time.sleep(_latency)
+    kind, value = outcome
+    if kind == "error":
+        raise value
+    return value
+
+def provider_call(source, key, fn):
+    """
+    Performs one upstream call through the active provider mode.
+    source: upstream name ('yahoo', 'borsapy', 'etf.com', 'investing.com', 'github')
+    key:    hashable description of the request (must be deterministic)
+    fn:     zero-argument callable doing the real request
+    """
+    if _mode == REPLAY:
+        return _replay(source, key)
+
+    if _mode == LIVE:
+        return _guarded_call(source, key, fn)
+
+    # RECORD: hatalar da kaydedilir ki replay aynı davranışı üretsin
+    now() # manifest'i yaz
+    try:
+        value = _guarded_call(source, key, fn)
+    except CircuitOpenError:
+        raise # Kaynağa hiç gidilmedi: kaydedilecek bir cevap yok
+    except Exception as e:
+        _record(source, key, ("error", e))
+        raise
+    _record(source, key, ("value", value))
+    return value
@@ -0,0 +1,191 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import borsapy as bp
+import pandas as pd
+import config
+from provider_module import provider_call, get_upstream_stats
+
+# --- YAHOO / BORSAPY ARASINDA GECİKMEYE DUYARLI YÖNLENDİRME ---
+# BIST hisseleri, BIST endeksleri ve TL kurları iki kaynaktan da alınabilir:
+#   yahoo   -> THYAO.IS, XU100.IS, TRY=X
+#   borsapy -> bp.Ticker("THYAO"), bp.Index("XU100"), bp.FX("USD")
+# Her (kaynak, enstrüman sınıfı) için son gecikme ve hata oranı (EWMA) tutulur;
+# istek sağlıklı olana gider. Cevap ROUTING_HEDGE_AFTER saniyede gelmezse diğer
+# kaynak da denenir, ilk gelen kazanır.
+
+BACKENDS = ["yahoo", "borsapy"]
+
+# yfinance periyotları -> borsapy periyotları
+BORSAPY_PERIODS = {
+    "1d": "1g", "5d": "5g", "1mo": "1ay", "3mo": "3ay", "6mo": "6ay",
+    "1y": "1y", "2y": "2y", "5y": "5y", "10y": "10y", "ytd": "ytd", "max": "max"
+}
+
+_health = {} # {(backend, cls): {"latency": ewma sn, "errors": ewma oran, "samples": n, "updated": monotonic}}
+_health_lock = threading.Lock()
+# data_provider.fetch_concurrently FETCH_MAX_WORKERS sembolü aynı anda buraya yollar, her biri
+# (hedge ile) her kaynağa birer istek açabilir: havuz küçük kalırsa yönlendirilen çekimler sıraya girer
+_executor = ThreadPoolExecutor(max_workers=config.FETCH_MAX_WORKERS * len(BACKENDS))
+
+def classify(symbol):
+    """
+    Returns the instrument class of a Yahoo symbol ('bist_stock', 'bist_index', 'fx')
+    or None if only Yahoo can serve it.
+    """
+    symbol = symbol.upper()
+    if symbol.endswith(".IS"):
+        return "bist_index" if symbol.startswith("XU") else "bist_stock"
+    if symbol.endswith("TRY=X"):
+        return "fx"
+    return None
+
+def _fx_code(symbol):
+    code = symbol.upper().replace("TRY=X", "")
+    return code or "USD" # TRY=X: 1 USD kaç TL
+
+def _normalize(df):
+    """Brings a borsapy frame to the Yahoo shape: Open..Volume on a tz-naive date index."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.rename(columns=lambda c: str(c).capitalize())
+    if "Close" not in df.columns:
+        return pd.DataFrame()
+    df.index = pd.to_datetime(df.index)
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index = df.index.normalize()
+    df.index.name = None
+    return df.reindex(columns=["Open", "High", "Low", "Close", "Volume"]).sort_index()
+
+def _fetch_yahoo(symbol, period, start):
+    from data_provider import download_history, get_symbol_history
+    return get_symbol_history(download_history([symbol], period=period, start=start), symbol)
+
+def _fetch_borsapy(symbol, period, start):
+    cls = classify(symbol)
+    if cls == "fx":
+        asset = bp.FX(_fx_code(symbol))
+    elif cls == "bist_index":
+        asset = bp.Index(symbol[:-3])
+    else:
+        asset = bp.Ticker(symbol[:-3])
+
+    window = {"start": start} if start else {"period": BORSAPY_PERIODS.get(period, period)}
+    hist = provider_call("borsapy", ("history", symbol, tuple(window.items())),
+                         lambda: asset.history(**window))
+    return _normalize(hist)
+
+FETCHERS = {"yahoo": _fetch_yahoo, "borsapy": _fetch_borsapy}
+
+def _decayed_errors(entry, now):
+    """Error rate of an entry, halved every config.ROUTING_ERROR_HALF_LIFE seconds without a new sample."""
+    return entry["errors"] * 0.5 ** ((now - entry["updated"]) / config.ROUTING_ERROR_HALF_LIFE)
+
+def report(backend, cls, elapsed, ok):
+    """
+    Feeds one observed call into the health table.
+    elapsed: latency in seconds, or None when it is not comparable (e.g. a batched download).
+    ok: True / False, or the fraction (0-1) of a batch's symbols that were served.
+    """
+    alpha = config.ROUTING_EWMA_ALPHA
+    error = 1.0 - float(ok)
+    now = time.monotonic()
+    with _health_lock:
+        entry = _health.setdefault((backend, cls), {"latency": None, "errors": error, "samples": 0, "updated": now})
+        if entry["samples"]:
+            entry["errors"] = (1 - alpha) * _decayed_errors(entry, now) + alpha * error
+        if elapsed is not None:
+            entry["latency"] = elapsed if entry["latency"] is None else (1 - alpha) * entry["latency"] + alpha * elapsed
+        entry["samples"] += 1
+        entry["updated"] = now
+
+def get_health():
+    """Returns {(backend, cls): {'latency', 'errors', 'samples', 'updated'}} for monitoring."""
+    with _health_lock:
+        return {key: dict(value) for key, value in _health.items()}
+
+def _score(backend, cls):
+    """
+    Lower is better: expected latency (s) plus a penalty per unit error rate. Open circuits go last.
+    The error rate decays while a backend is not used, so a demoted backend is retried eventually;
+    a backend never sampled starts at config.ROUTING_UNKNOWN_ERROR_RATE.
+    """
+    if get_upstream_stats().get(backend, {}).get("state") == "open":
+        return float("inf")
+    with _health_lock:
+        entry = _health.get((backend, cls))
+        if entry is None:
+            return config.ROUTING_ERROR_PENALTY * config.ROUTING_UNKNOWN_ERROR_RATE
+        errors = _decayed_errors(entry, time.monotonic())
+    return (entry["latency"] or 0.0) + config.ROUTING_ERROR_PENALTY * errors
+
+def rank_backends(symbol):
+    """Returns the backends able to serve 'symbol', healthiest first."""
+    cls = classify(symbol)
+    if cls is None:
+        return ["yahoo"]
+    # Eşit skorda listedeki sıra (önce Yahoo) korunur
+    return sorted(BACKENDS, key=lambda b: _score(b, cls))
+
+def preferred_backend(symbol):
+    return rank_backends(symbol)[0]
+
+def _timed_fetch(backend, symbol, period, start):
+    cls = classify(symbol)
+    started = time.monotonic()
+    try:
+        hist = FETCHERS[backend](symbol, period, start)
+    except Exception as e:
+        report(backend, cls, time.monotonic() - started, False)
+        raise
+    report(backend, cls, time.monotonic() - started, not hist.empty)
+    hist.attrs["source"] = backend # borsapy barları düzeltilmemiştir (bkz. data_provider._download_routed)
+    return hist
+
+def fetch_routed_history(symbol, period="1y", start=None, hedge=None, exclude=()):
+    """
+    Fetches one instrument's OHLCV history from the healthiest backend.
+    With hedging on (config.ROUTING_HEDGE), if the first backend has not answered
+    after config.ROUTING_HEDGE_AFTER seconds the next one is fired as well and the
+    first non-empty answer wins. A failed or empty answer falls through to the next
+    backend. 'exclude' skips backends that already failed this request.
+    The serving backend is recorded in hist.attrs['source'].
+    Returns an empty DataFrame if every backend fails.
+    """
+    backends = [b for b in rank_backends(symbol) if b not in exclude]
+    if not backends:
+        return pd.DataFrame()
+    hedge = config.ROUTING_HEDGE if hedge is None else hedge
+    futures = {}
+    pending = set()
+
+    def launch(backend):
+        fut = _executor.submit(contextvars.copy_context().run, _timed_fetch, backend, symbol, period, start)
+        futures[fut] = backend
+        pending.add(fut)
+
+    launch(backends.pop(0))
+    while pending:
+        timeout = config.ROUTING_HEDGE_AFTER if hedge and backends else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # Yavaş cevap: ikinci kaynağı da ateşle, hangisi önce gelirse
+            launch(backends.pop(0))
+            continue
+
+        for fut in done:
+            pending.discard(fut)
+            try:
+                hist = fut.result()
+            except Exception as e:
+                print(f"Routed fetch error ({futures[fut]} {symbol}): {e}")
+                hist = None
+            if hist is not None and not hist.empty:
+                return hist # Geride kalan istek arka planda biter, sağlık tablosunu besler
+
+        if not pending and backends:
+            launch(backends.pop(0))
+
+    return pd.DataFrame()
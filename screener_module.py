@@ -1,7 +1,12 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import config
+from data_provider import fetch_history, get_symbol_history, fetch_concurrently
+from indicator_engine import get_indicator
+from fundamentals_cache import get_ticker_info
+from cache_module import disk_cached
+from provider_module import provider_call
+from deadline_module import cap_timeout
 import requests
 from bs4 import BeautifulSoup
 import time
@@ -17,7 +22,7 @@ def fetch_etf_details_from_web(ticker):
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=5)
+        response = provider_call("etf.com", ("get", url), lambda: requests.get(url, headers=headers, timeout=cap_timeout(5)))
         if response.status_code != 200:
             return None
             
@@ -75,7 +80,7 @@ def fetch_etf_details_from_web(ticker):
         return None
 
 @st.cache_data(ttl=1800) 
-@st.cache_data(ttl=1800) 
+@disk_cached(ttl=1800)
 def fetch_bist_data():
     """
     Fetches data for BIST 100 tickers using a robust method:
@@ -86,13 +91,16 @@ def fetch_bist_data():
     tickers = config.BIST_100_TICKERS
     data = []
     
-    for symbol in tickers:
+    # A. Robust Price Fetch (History) - tek toplu istek
+    # Fetch last 5 days to ensure we get a valid close even after weekends/holidays
+    prices = fetch_history(tickers, period="5d")
+    
+    # B. Fundamentals (Info) - sınırlı iş parçacığı havuzunda paralel, sıra korunur
+    infos = fetch_concurrently(get_ticker_info, tickers) # 24 saatlik önbellek, sadece bayatlar ağa çıkar
+    
+    for symbol, info in zip(tickers, infos):
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # A. Robust Price Fetch (History)
-            # Fetch last 5 days to ensure we get a valid close even after weekends/holidays
-            hist = ticker.history(period="5d")
+            hist = get_symbol_history(prices, symbol)
             
             if hist.empty:
                 # If history fails, completely skip (dead ticker?)
@@ -106,8 +114,8 @@ def fetch_bist_data():
                 prev_close = hist['Close'].iloc[-2]
                 pct_change = ((current_price - prev_close) / prev_close) * 100
             
-            # B. Fundamentals (Info) - Tolerant
-            info = ticker.info
+            # Tolerant: info gelmediyse hisse yine listelenir ("Veri Yok")
+            info = info or {}
             name = info.get('shortName', symbol)
             sector = info.get('sector', 'Unknown')
             
@@ -160,7 +168,7 @@ def fetch_bist_data():
             })
                 
         except Exception as e:
-            # print(f"Error {symbol}: {e}")
+            print(f"BIST tarama hatası ({symbol}): {e}")
             continue
 
     # Create DF
@@ -175,11 +183,13 @@ def fetch_bist_data():
     return df
 
 @st.cache_data(ttl=3600)
+@disk_cached(ttl=3600)
 def fetch_us_etf_data():
     """
     Fetches US ETF data using a Hybrid Approach:
     - Static Data (Name, Segment, Expense): Hardcoded DB (Guaranteed)
     - Dynamic Data (Price, Change): yfinance
+    - RSI (14, Wilder): shared indicator engine (memoized per last bar)
     """
     
     # Static Database (Guaranteed Data)
@@ -199,12 +209,14 @@ def fetch_us_etf_data():
     }
     
     data = []
+    prices = fetch_history(list(ETF_DB.keys()), period="5d") # Fetch slightly more to ensure % change calc
+    infos = fetch_concurrently(get_ticker_info, list(ETF_DB.keys()))
+    rsi = get_indicator(list(ETF_DB.keys()), "rsi", period="1y", window=14)
     
-    for symbol, static_info in ETF_DB.items():
+    for (symbol, static_info), info in zip(ETF_DB.items(), infos):
         try:
             # Dynamic Fetch
-            t = yf.Ticker(symbol)
-            hist = t.history(period="5d") # Fetch slightly more to ensure % change calc
+            hist = get_symbol_history(prices, symbol)
             
             price = 0
             ytd_ret = 0
@@ -217,9 +229,11 @@ def fetch_us_etf_data():
                 pass
             
             # Fetch Info for YTD Return
-            info = t.info
+            info = info or {}
             ytd_ret = info.get('ytdReturn', 0) * 100 if info.get('ytdReturn') else 0
             if price == 0: price = info.get('currentPrice', 0)
+            rsi_hist = rsi.get(symbol)
+            rsi_val = rsi_hist['rsi'].dropna().iloc[-1] if rsi_hist is not None and rsi_hist['rsi'].notna().any() else None
 
             data.append({
                 "Sembol": symbol,
@@ -227,6 +241,7 @@ def fetch_us_etf_data():
                 "Kategori": static_info['segment'],
                 "Fiyat ($)": price,
                 "YTD Getiri (%)": ytd_ret,
+                "RSI (14)": rsi_val,
                 "Masraf (%)": static_info['expense']
             })
             
@@ -238,6 +253,7 @@ def fetch_us_etf_data():
                 "Kategori": static_info['segment'],
                 "Fiyat ($)": 0,
                 "YTD Getiri (%)": 0,
+                "RSI (14)": None,
                 "Masraf (%)": static_info['expense']
             })
             continue
@@ -1,5 +1,6 @@
 import yfinance as yf
 from textblob import TextBlob
+from provider_module import provider_call
 
 from datetime import datetime
 import time
@@ -23,8 +24,7 @@ def get_sentiment_score(symbol):
     Fetches latest news for a symbol and returns detailed sentiment.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        news = ticker.news
+        news = provider_call("yahoo", ("news", symbol), lambda: yf.Ticker(symbol).news)
         
         if not news or len(news) == 0:
             return {
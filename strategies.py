@@ -1,3 +1,4 @@
+import numpy as np
 from analysis_module import calculate_sma, calculate_rsi
 
 def get_smart_dca_multiplier(df_row):
@@ -17,3 +18,14 @@ def get_smart_dca_multiplier(df_row):
     if rsi and rsi > 80:
         return 0.5
     return 1.0
+
+def get_smart_dca_multipliers(df, dip_multiplier=1.5, overbought_rsi=80, overbought_multiplier=0.5):
+    """
+    Vectorized get_smart_dca_multiplier for every row of a frame with Close, SMA200, RSI.
+    The defaults are the fixed rules above; the parameters exist for sweeps.
+    """
+    price = df['Close'].to_numpy(dtype=float)
+    sma200 = df['SMA200'].to_numpy(dtype=float) if 'SMA200' in df.columns else np.full(len(df), np.nan)
+    rsi = df['RSI'].to_numpy(dtype=float) if 'RSI' in df.columns else np.full(len(df), np.nan)
+    # NaN karşılaştırmaları False döner: satır bazlı sürümle aynı sonuç
+    return np.where(price < sma200, dip_multiplier, np.where(rsi > overbought_rsi, overbought_multiplier, 1.0))
@@ -0,0 +1,193 @@
+import json
+import copy
+import sqlite3
+import math
+from datetime import datetime
+import config
+import price_store
+from database import DB_NAME, create_indicator_state_table
+
+# --- AKAN (STREAMING) İNDİKATÖRLER ---
+# SMA (config.STREAMING_SMA_WINDOWS), RSI ve hacim ortalaması her sembol için
+# 'indicator_state' tablosunda durum olarak tutulur. Yeni bar geldiğinde geçmiş yeniden
+# taranmaz: pencere tamponu ve ortalamalar bar başına sabit sürede güncellenir.
+#
+# Son bar gün içinde değişebildiği (fiyat deposu onu her seferinde yeniden yazdığı) için
+# iki durum saklanır: 'base' (sondan bir önceki bara kadar) ve 'head' (son bar dahil).
+# Güncelleme her zaman base'den başlar; böylece revize edilen son bar çift sayılmaz.
+# Durumlar fiyat yenilemesinde değil, get_latest çağrıldığında depodaki barlara yetiştirilir.
+# Tanımlar analysis_module ile aynıdır (RSI basit ortalamalı), böylece puanlar değişmez.
+
+_STATE_VERSION = 2 # durum biçimi değişince eski kayıtlar yeniden tohumlanır
+_schema_ready = False
+
+def _connect():
+    global _schema_ready
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    if not _schema_ready:
+        create_indicator_state_table(conn.cursor())
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+def _empty_state():
+    return {
+        "version": _STATE_VERSION,
+        "date": None,
+        "count": 0,
+        "prev_close": None,
+        "sma": {str(w): {"buffer": [], "sum": 0.0} for w in config.STREAMING_SMA_WINDOWS},
+        "rsi": {"gain": {"buffer": [], "sum": 0.0}, "loss": {"buffer": [], "sum": 0.0}},
+        "volume": {"buffer": [], "sum": 0.0, "flags": [], "missing": 0}
+    }
+
+def _push(window, value, size):
+    """Adds 'value' to a fixed-size window {'buffer', 'sum'} (running sum, no re-summing)."""
+    window["buffer"].append(value)
+    window["sum"] += value
+    if len(window["buffer"]) > size:
+        window["sum"] -= window["buffer"].pop(0)
+
+def _apply_bar(state, date, close, volume):
+    """Advances a state by one bar."""
+    for w, window in state["sma"].items():
+        _push(window, close, int(w))
+
+    # RSI (analysis_module.calculate_rsi gibi): kazanç/kayıpların basit hareketli ortalaması.
+    # İlk barın farkı orada da 0 sayılır.
+    period = config.STREAMING_RSI_PERIOD
+    delta = 0.0 if state["prev_close"] is None else close - state["prev_close"]
+    _push(state["rsi"]["gain"], max(delta, 0.0), period)
+    _push(state["rsi"]["loss"], max(-delta, 0.0), period)
+
+    # Hacim: eksik değer pencerede kaldıkça ortalama tanımsızdır (pandas rolling gibi)
+    vol = state["volume"]
+    missing = volume is None or math.isnan(volume)
+    _push(vol, 0.0 if missing else volume, config.STREAMING_VOLUME_WINDOW)
+    vol["flags"].append(missing)
+    vol["missing"] += missing
+    if len(vol["flags"]) > config.STREAMING_VOLUME_WINDOW:
+        vol["missing"] -= vol["flags"].pop(0)
+
+    state["prev_close"] = close
+    state["date"] = date
+    state["count"] += 1
+
+def _values(state):
+    """Current indicator values of a state."""
+    out = {"date": state["date"], "close": state["prev_close"]}
+    for w, window in state["sma"].items():
+        full = len(window["buffer"]) == int(w)
+        out[f"sma{w}"] = window["sum"] / int(w) if full else None
+
+    # 14 elemanlı tampon her seferinde toplanır: süregelen toplamın kayması sıfır kaybı bozmasın
+    gains, losses = state["rsi"]["gain"]["buffer"], state["rsi"]["loss"]["buffer"]
+    if len(gains) < config.STREAMING_RSI_PERIOD:
+        out["rsi"] = None
+    elif sum(losses) == 0:
+        out["rsi"] = 100.0 if sum(gains) > 0 else None
+    else:
+        out["rsi"] = 100 - 100 / (1 + sum(gains) / sum(losses))
+
+    vol = state["volume"]
+    full = len(vol["buffer"]) == config.STREAMING_VOLUME_WINDOW
+    out["volume_mean"] = vol["sum"] / config.STREAMING_VOLUME_WINDOW if full and vol["missing"] == 0 else None
+    out["volume"] = None if not vol["flags"] or vol["flags"][-1] else vol["buffer"][-1]
+    out["bars"] = state["count"]
+    return out
+
+def _load(symbol):
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT state FROM indicator_state WHERE symbol = ?", (symbol,))
+    res = cursor.fetchone()
+    conn.close()
+    return json.loads(res[0]) if res else None
+
+def _save(symbol, stored):
+    conn = _connect()
+    conn.execute('''
+        INSERT OR REPLACE INTO indicator_state (symbol, last_date, state, updated_at)
+        VALUES (?, ?, ?, ?)
+    ''', (symbol, stored["head"]["date"], json.dumps(stored), datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    conn.close()
+
+def _bars(hist):
+    for date, bar in hist.iterrows():
+        close = bar.get("Close")
+        if close is None or math.isnan(close):
+            continue
+        volume = bar.get("Volume")
+        missing = volume is None or math.isnan(volume)
+        yield date.strftime("%Y-%m-%d"), float(close), None if missing else float(volume)
+
+def _advance(stored, hist):
+    """
+    Applies the bars of 'hist' after the base state to 'stored' in place.
+    Returns False when there is nothing to apply.
+    """
+    # Son bar revize edilebilir: base'den (sondan bir önceki bar) devam edilir
+    base, head_date = stored["base"], stored["head"]["date"]
+    bars = [b for b in _bars(hist) if base["date"] is None or b[0] > base["date"]]
+    if not bars or (head_date and bars[-1][0] < head_date):
+        return False
+
+    for i, (date, close, volume) in enumerate(bars):
+        if i == len(bars) - 1:
+            stored["base"] = copy.deepcopy(base)
+        _apply_bar(base, date, close, volume)
+    stored["head"] = base
+    return True
+
+def reset_symbol(symbol):
+    """Drops a symbol's state (e.g. after a split re-adjustment); it is re-seeded on the next get_latest."""
+    conn = _connect()
+    conn.execute("DELETE FROM indicator_state WHERE symbol = ?", (symbol,))
+    conn.commit()
+    conn.close()
+
+def _catch_up(symbol, stored):
+    """
+    Brings a stored state (or None) up to the bars in the price store.
+    Only the bars from the base date on are read; nothing is written when the
+    state already ends on the stored last bar.
+    """
+    if stored is None or stored["head"].get("version") != _STATE_VERSION:
+        stored = {"base": _empty_state(), "head": _empty_state()}
+    hist = price_store.load_prices(symbol, start=stored["base"]["date"])
+    if hist.empty:
+        return None if stored["head"]["date"] is None else stored
+
+    # Gün içinde son barın fiyatı ya da hacmi değişmiş olabilir
+    head = _values(stored["head"])
+    if list(_bars(hist.iloc[-1:])) == [(head["date"], head["close"], head["volume"])]:
+        return stored
+    if _advance(stored, hist):
+        _save(symbol, stored)
+    return stored
+
+def get_latest(symbols):
+    """
+    Returns {symbol: {'date', 'close', 'sma50', 'sma200', 'rsi', 'volume_mean',
+    'volume', 'bars'}} as of the last bar in the price store (None where a window
+    is not full yet). Definitions match analysis_module.build_feature_frame,
+    including the simple-mean RSI. States are caught up lazily here: only the
+    bars after the stored state are read, so price refreshes pay nothing.
+    Symbols without stored prices are left out.
+    """
+    if not symbols:
+        return {}
+    conn = _connect()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(symbols))
+    cursor.execute(f"SELECT symbol, state FROM indicator_state WHERE symbol IN ({placeholders})", list(symbols))
+    states = {sym: json.loads(state) for sym, state in cursor.fetchall()}
+    conn.close()
+
+    latest = {}
+    for sym in symbols:
+        stored = _catch_up(sym, states.get(sym))
+        if stored is not None:
+            latest[sym] = _values(stored["head"])
+    return latest
@@ -2,6 +2,7 @@ from github import Github
 import json
 import os
 import streamlit as st
+from provider_module import provider_call
 
 # Helper to get secrets safely (reused logic)
 def get_secret(key):
@@ -55,8 +56,9 @@ def get_subscribers():
         return []
 
     try:
-        contents = repo.get_contents("subscribers.json")
-        data = json.loads(contents.decoded_content.decode())
+        content = provider_call("github", ("get_contents", "subscribers.json"),
+                                lambda: repo.get_contents("subscribers.json").decoded_content)
+        data = json.loads(content.decode())
         return data.get("subscribers", [])
     except Exception as e:
         print(f"File Error: {e}")
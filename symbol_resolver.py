@@ -0,0 +1,132 @@
+import sqlite3
+import yfinance as yf
+from datetime import datetime
+from database import DB_NAME, create_symbol_map_table
+from data_provider import fetch_history, get_symbol_history
+from provider_module import provider_call
+
+# --- SEMBOL ÇÖZÜMLEYİCİ ---
+# 'THYAO' gibi çıplak sembollerin hangi Yahoo tickerına karşılık geldiğini
+# (borsa ve kote para birimiyle) ilk başarılı denemede SQLite'a kaydeder.
+# Evreni BIST olan çağıranlar (paper trader, portföy geçmişi) market="BIST" verir: çıplak
+# kod önce .IS ile denenir, ABD'de aynı kodlu bir ticker yanlış eşleşmez. Eşleşmeler
+# (sembol, pazar) anahtarıyla saklanır; farklı ipucuyla çözen çağıranlar birbirinin
+# kaydını ezmez.
+
+_schema_ready = False
+
+def _connect():
+    global _schema_ready
+    conn = sqlite3.connect(DB_NAME, timeout=30)
+    if not _schema_ready:
+        create_symbol_map_table(conn.cursor())
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+def _candidates(symbol, market=None):
+    """
+    Bare symbols may be US tickers or BIST tickers without the .IS suffix.
+    With market='BIST' the .IS ticker is tried first.
+    """
+    candidates = [symbol]
+    if "." not in symbol and "-" not in symbol and "=" not in symbol and "^" not in symbol:
+        candidates.append(symbol + ".IS")
+        if market == "BIST":
+            candidates.reverse()
+    return candidates
+
+def _guess_listing(ticker):
+    """Suffix-based (exchange, currency) guess, used when Yahoo metadata is unavailable."""
+    if ticker.endswith(".IS"):
+        return "IST", "TRY"
+    if ticker.endswith("TRY=X"):
+        return "CCY", "TRY"
+    if ticker.endswith("-USD") or ticker.endswith("=X") or ticker.endswith("=F"):
+        return None, "USD"
+    return None, "USD" # Assume Foreign (Default USD)
+
+def _fetch_fast_info(ticker):
+    fast_info = yf.Ticker(ticker).fast_info
+    return {"exchange": fast_info.get("exchange"), "currency": fast_info.get("currency")}
+
+def _listing_for(ticker):
+    """Returns (exchange, currency) from Yahoo metadata, falling back to suffix rules."""
+    exchange, currency = _guess_listing(ticker)
+    try:
+        meta = provider_call("yahoo", ("fast_info", ticker), lambda: _fetch_fast_info(ticker))
+        exchange = meta.get("exchange") or exchange
+        currency = (meta.get("currency") or currency).upper()
+    except Exception:
+        pass
+    return exchange, currency
+
+def _load(symbols, market):
+    conn = _connect()
+    cursor = conn.cursor()
+    placeholders = ",".join("?" * len(symbols))
+    cursor.execute(f"SELECT symbol, ticker, exchange, currency FROM symbol_map WHERE market = ? AND symbol IN ({placeholders})",
+                   [market or ""] + symbols)
+    rows = cursor.fetchall()
+    conn.close()
+    return {r[0]: {"symbol": r[0], "ticker": r[1], "exchange": r[2], "currency": r[3]} for r in rows}
+
+def _save(entry, market):
+    conn = _connect()
+    conn.execute('''
+        INSERT OR REPLACE INTO symbol_map (symbol, market, ticker, exchange, currency, resolved_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (entry["symbol"], market or "", entry["ticker"], entry["exchange"], entry["currency"], datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    conn.commit()
+    conn.close()
+
+def resolve_symbols(symbols, market=None):
+    """
+    Resolves many symbols at once.
+    Returns {symbol: {'symbol', 'ticker', 'exchange', 'currency'}}; symbols that
+    no candidate ticker has data for are left out. Unknown symbols are probed
+    with one batched download per candidate round and the hits are persisted.
+    market='BIST' tries bare codes with .IS first. Mappings are stored per market
+    hint, so a hinted and an unhinted lookup of the same code never share an entry.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols if s))
+    if not symbols:
+        return {}
+
+    resolved = _load(symbols, market)
+    pending = [s for s in symbols if s not in resolved]
+
+    # Round 0: preferred candidate (as-is, or .IS for BIST), Round 1: the other one
+    for round_idx in range(2):
+        probes = {s: _candidates(s, market)[round_idx] for s in pending if len(_candidates(s, market)) > round_idx}
+        if not probes:
+            break
+        prices = fetch_history(list(probes.values()), period="5d")
+        for sym, ticker in probes.items():
+            if get_symbol_history(prices, ticker).empty:
+                continue
+            exchange, currency = _listing_for(ticker)
+            entry = {"symbol": sym, "ticker": ticker, "exchange": exchange, "currency": currency}
+            _save(entry, market)
+            resolved[sym] = entry
+        pending = [s for s in pending if s not in resolved]
+
+    return resolved
+
+def resolve_symbol(symbol, market=None):
+    """Resolves a single symbol; returns the mapping dict or None."""
+    return resolve_symbols([symbol], market=market).get(symbol.upper()) if symbol else None
+
+def to_ticker(symbol, market=None):
+    """Returns the Yahoo ticker for a symbol, or a suffix-based guess if it can't be resolved."""
+    entry = resolve_symbol(symbol, market=market)
+    if entry:
+        return entry["ticker"]
+    return _candidates(symbol.upper())[-1]
+
+def get_quote_currency(symbol):
+    """Returns the quote currency (e.g. 'TRY', 'USD') of a symbol."""
+    entry = resolve_symbol(symbol)
+    if entry:
+        return entry["currency"]
+    return _guess_listing(_candidates(symbol.upper())[-1])[1]
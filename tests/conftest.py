@@ -0,0 +1,48 @@
+import os
+import sys
+import types
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+
+# Modüller depo kökünde düz duruyor (paket yok)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Ağ paketleri kurulu değilse boş modüllerle yer tutulur: testler ağa hiç çıkmaz,
+# indirme fonksiyonları monkeypatch ile değiştirilir.
+for _name in ("yfinance", "borsapy"):
+    try:
+        importlib.import_module(_name)
+    except ImportError:
+        sys.modules[_name] = types.ModuleType(_name)
+
+SYMBOL = "AAA"
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    """
+    Temporary price store plus a fake batched download of SYMBOL that records its
+    requests. state['bars'] is the upstream history (editable by the test).
+    """
+    import price_store
+    import data_provider
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(price_store, "DB_NAME", str(tmp_path / "store.db"))
+    monkeypatch.setattr(price_store, "_schema_ready", False)
+
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=400)
+    close = 100 + np.arange(len(index), dtype=float)
+    state = {"bars": pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0}, index=index),
+             "calls": []}
+
+    def fake_download(symbols, period="1y", interval="1d", start=None):
+        state["calls"].append({"symbols": list(symbols), "period": period, "start": start})
+        bars = state["bars"]
+        bars = bars[bars.index >= (start or data_provider.period_to_start_date(period))]
+        if bars.empty:
+            return pd.DataFrame()
+        return pd.concat({SYMBOL: bars}, axis=1).swaplevel(0, 1, axis=1)
+
+    monkeypatch.setattr(data_provider, "download_history", fake_download)
+    return state
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from analysis_module import calculate_sma, calculate_rsi, calculate_score_series
+from strategies import get_smart_dca_multiplier
+from backtest_module import COMMISSION_RATE, run_backtest
+
+STRATEGIES = ['RSI Stratejisi (30/70)', 'Teknik Puan (80/40)', 'SMA Cross (50/200)', 'Al ve Tut', 'Smart DCA', 'Normal DCA']
+
+def _prices(seed, n):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                         "Volume": rng.uniform(1e5, 1e6, n)}, index=pd.bdate_range("2020-01-01", periods=n))
+
+def reference_backtest(df, strategy_name, initial_capital, monthly_dca):
+    """Bar-by-bar loop the array engine replaced (SMA Cross with its intended cross rules)."""
+    data = df.copy()
+    data['SMA50'] = calculate_sma(data, 50)
+    data['SMA200'] = calculate_sma(data, 200)
+    data['RSI'] = calculate_rsi(data)
+    if strategy_name == 'Teknik Puan (80/40)':
+        data['Score'] = calculate_score_series(data)['score']
+
+    cash, position, trade_count = initial_capital, 0, 0
+    total_invested = initial_capital
+    last_month, side = -1, None
+    equity = []
+
+    def buy():
+        nonlocal cash, position, trade_count
+        position, cash, trade_count = cash / (price * (1 + COMMISSION_RATE)), 0, trade_count + 1
+
+    def sell():
+        nonlocal cash, position, trade_count
+        cash, position, trade_count = position * price * (1 - COMMISSION_RATE), 0, trade_count + 1
+
+    for i in range(len(data)):
+        row = data.iloc[i]
+        price = row['Close']
+        if monthly_dca > 0:
+            if data.index[i].month != last_month:
+                multiplier = get_smart_dca_multiplier(row) if strategy_name == 'Smart DCA' else 1.0
+                cash += monthly_dca * multiplier
+                total_invested += monthly_dca * multiplier
+                last_month = data.index[i].month
+                position += cash / (price * (1 + COMMISSION_RATE))
+                cash = 0
+                trade_count += 1
+        elif strategy_name == 'RSI Stratejisi (30/70)':
+            if row['RSI'] < 30 and position == 0:
+                buy()
+            elif row['RSI'] > 70 and position > 0:
+                sell()
+        elif strategy_name == 'Teknik Puan (80/40)':
+            if row['Score'] > 80 and position == 0:
+                buy()
+            elif row['Score'] < 40 and position > 0:
+                sell()
+        elif strategy_name == 'SMA Cross (50/200)' and not np.isnan(row['SMA200']):
+            now = np.sign(row['SMA50'] - row['SMA200'])
+            if now > 0 and side != 1 and position == 0:
+                buy()
+            elif now < 0 and side != -1 and position > 0:
+                sell()
+            side = now
+        elif strategy_name == 'Al ve Tut' and i == 0:
+            buy()
+        equity.append(cash + position * price)
+    return np.array(equity), round(total_invested, 2), trade_count
+
+@pytest.mark.parametrize("strategy_name", STRATEGIES)
+@pytest.mark.parametrize("monthly_dca", [0, 500])
+@pytest.mark.parametrize("seed", range(4))
+def test_array_engine_matches_loop(strategy_name, monthly_dca, seed):
+    df = _prices(seed, 700 + 150 * seed)
+    result = run_backtest(df, strategy_name, 1000, monthly_dca)
+    equity, total_invested, trade_count = reference_backtest(df, strategy_name, 1000, monthly_dca)
+
+    np.testing.assert_allclose(result['equity_curve']['Strategy_Equity'].to_numpy(), equity, rtol=1e-12)
+    assert result['metrics']['total_invested'] == total_invested
+    assert result['metrics']['trade_count'] == trade_count
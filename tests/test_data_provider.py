@@ -0,0 +1,7 @@
+import data_provider
+from conftest import SYMBOL
+
+def test_day_period_returns_trading_bars(upstream):
+    closes = data_provider.get_symbol_history(data_provider.fetch_history([SYMBOL], period="5d"), SYMBOL)["Close"]
+    assert len(closes) == 5
+    assert closes.index[-1] == upstream["bars"].index[-1]
@@ -0,0 +1,33 @@
+import time
+import config
+import deadline_module
+
+def test_page_budget_only_bounds_guarded_calls(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(config.PAGE_BUDGETS, "Test", 2)
+    deadline_module.start_page_budget("Test")
+
+    # Korunmayan çağrılar sayfa bütçesinden etkilenmez
+    assert deadline_module.remaining() is None
+    assert deadline_module.cap_timeout(10) == 10
+
+    left, _ = deadline_module.run_within_budget("guarded", deadline_module.remaining, share=0.5)
+    assert 0 < left <= 1
+
+def test_late_call_continues_with_background_budget(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(config.PAGE_BUDGETS, "Test", 0.4)
+    deadline_module.start_page_budget("Test")
+    seen = {}
+
+    def slow():
+        time.sleep(0.5)
+        seen["remaining"] = deadline_module.remaining()
+        return "ok"
+
+    value, freshness = deadline_module.run_within_budget("slow", slow, share=0.5)
+    assert value is None and freshness["timed_out"]
+
+    time.sleep(0.6)
+    # Sayfanın dilimi bitti, arka plandaki iş yeni süresiyle devam eder
+    assert seen["remaining"] > config.BACKGROUND_FETCH_BUDGET - 5
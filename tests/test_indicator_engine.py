@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+import data_provider
+import indicator_engine
+
+@pytest.fixture
+def served(monkeypatch):
+    """get_indicator reads a hand-made wide frame; counts kernel runs."""
+    index = pd.bdate_range("2024-01-01", periods=60)
+    close = 100 + np.sin(np.arange(60))
+    state = {"wide": pd.concat({"AAA": pd.DataFrame({"Close": close, "Volume": 1.0}, index=index)}, axis=1)
+                       .swaplevel(0, 1, axis=1), "runs": 0}
+    real = indicator_engine.compute_indicator
+
+    def counting(wide, name, **params):
+        state["runs"] += 1
+        return real(wide, name, **params)
+
+    monkeypatch.setattr(data_provider, "fetch_history", lambda symbols, period="1y": state["wide"])
+    monkeypatch.setattr(indicator_engine, "compute_indicator", counting)
+    monkeypatch.setattr(indicator_engine, "_memo", type(indicator_engine._memo)())
+    return state
+
+def test_memo_serves_repeat_and_recomputes_revised_last_bar(served):
+    first = indicator_engine.get_indicator(["AAA"], "rsi", window=14)["AAA"]
+    indicator_engine.get_indicator(["AAA"], "rsi", window=14)
+    assert served["runs"] == 1
+
+    # Gün içi revizyon: son barın tarihi aynı, fiyatı farklı
+    wide = served["wide"].copy()
+    wide.iloc[-1, wide.columns.get_loc(("Close", "AAA"))] += 5
+    served["wide"] = wide
+    revised = indicator_engine.get_indicator(["AAA"], "rsi", window=14)["AAA"]
+    assert served["runs"] == 2
+    assert revised["rsi"].iloc[-1] > first["rsi"].iloc[-1]
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from backtest_module import run_backtest
+from optimization_module import run_parameter_sweep, run_walk_forward
+
+def _prices(n=1200, seed=3):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.015, n)))
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2018-01-01", periods=n))
+
+def test_smart_dca_without_monthly_amount_is_refused():
+    df = _prices()
+    assert run_parameter_sweep(df, 'Smart DCA').empty
+    assert run_walk_forward(df, 'Smart DCA') is None
+
+def test_sweep_row_matches_run_backtest():
+    df = _prices(n=800)
+    grid = {"rsi_window": [14], "lower": [30], "upper": [70]}
+    row = run_parameter_sweep(df, 'RSI Stratejisi (30/70)', grid=grid, workers=1).iloc[0]
+    metrics = run_backtest(df, 'RSI Stratejisi (30/70)', 1000)['metrics']
+    for key in ("total_invested", "final_equity", "total_return_pct", "trade_count"):
+        assert row[key] == metrics[key]
@@ -0,0 +1,67 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import config
+import price_store
+import data_provider
+from conftest import SYMBOL
+
+def _closes(wide):
+    return data_provider.get_symbol_history(wide, SYMBOL)["Close"]
+
+def test_first_call_downloads_then_store_serves(upstream):
+    first = _closes(data_provider.fetch_history([SYMBOL], period="1y"))
+    assert [c["start"] for c in upstream["calls"]] == [None]
+    assert first.index[-1] == upstream["bars"].index[-1]
+
+    # Yenileme süresi dolmadan ağa hiç çıkılmaz
+    second = _closes(data_provider.fetch_history([SYMBOL], period="1y"))
+    assert len(upstream["calls"]) == 1
+    pd.testing.assert_series_equal(first, second)
+
+def test_stale_symbol_resumes_from_second_to_last_bar(upstream, monkeypatch):
+    data_provider.fetch_history([SYMBOL], period="1y")
+    resume = price_store.get_resume_date(SYMBOL)
+    assert resume == upstream["bars"].index[-2].strftime("%Y-%m-%d")
+
+    # Yeni bir bar gelir; depo bayatlamış sayılır
+    bars = upstream["bars"]
+    new_day = bars.index[-1] + pd.offsets.BDay()
+    upstream["bars"] = pd.concat([bars, bars.iloc[[-1]].set_axis([new_day]) + 1])
+    monkeypatch.setattr(config, "PRICE_STORE_REFRESH_MINUTES", -1)
+
+    closes = _closes(data_provider.fetch_history([SYMBOL], period="1y"))
+    assert upstream["calls"][-1]["start"] == resume
+    assert closes.index[-1] == new_day
+    assert closes.iloc[-1] == upstream["bars"]["Close"].iloc[-1]
+
+def test_readjusted_history_triggers_full_reload(upstream, monkeypatch):
+    data_provider.fetch_history([SYMBOL], period="1y")
+    # Bölünme: tüm geçmiş yeniden düzeltilir, delta ilk bar depodakiyle uyuşmaz
+    upstream["bars"] = upstream["bars"] / 2
+    monkeypatch.setattr(config, "PRICE_STORE_REFRESH_MINUTES", -1)
+
+    closes = _closes(data_provider.fetch_history([SYMBOL], period="1y"))
+    assert [c["start"] is None for c in upstream["calls"]] == [True, False, True]
+    expected = upstream["bars"]["Close"]
+    np.testing.assert_allclose(closes.to_numpy(), expected[expected.index.isin(closes.index)].to_numpy())
+
+def test_failed_delta_does_not_block_retry(upstream):
+    data_provider.fetch_history([SYMBOL], period="1y")
+    # Kontrol zamanı yenileme süresinden eskiye çekilir: bir sonraki çağrı delta indirir
+    conn = sqlite3.connect(price_store.DB_NAME)
+    conn.execute("UPDATE price_coverage SET updated_at = '2000-01-01 00:00:00'")
+    conn.commit()
+    conn.close()
+
+    # Ağ hatası: indirme boş döner, kontrol zamanı güncellenmemeli ve sonraki çağrı yeniden denemeli
+    bars = upstream["bars"]
+    upstream["bars"] = bars.iloc[:0]
+    data_provider.fetch_history([SYMBOL], period="1y")
+    upstream["bars"] = bars
+    data_provider.fetch_history([SYMBOL], period="1y")
+    assert [c["start"] is None for c in upstream["calls"]] == [True, False, False]
+
+    # Başarılı delta kontrol zamanını günceller
+    data_provider.fetch_history([SYMBOL], period="1y")
+    assert len(upstream["calls"]) == 3
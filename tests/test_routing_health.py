@@ -0,0 +1,42 @@
+import types
+import pytest
+import config
+import routing_module
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fresh health table and a hand-driven monotonic clock."""
+    now = types.SimpleNamespace(t=1000.0)
+    monkeypatch.setattr(routing_module, "_health", {})
+    monkeypatch.setattr(routing_module, "time", types.SimpleNamespace(monotonic=lambda: now.t))
+    monkeypatch.setattr(routing_module, "get_upstream_stats", lambda: {})
+    return now
+
+def test_partial_batch_keeps_yahoo_preferred(clock):
+    # 40 sembolden biri (ör. kotasyondan çıkmış) gelmedi
+    routing_module.report("yahoo", "bist_stock", None, 39 / 40)
+    assert routing_module.get_health()[("yahoo", "bist_stock")]["errors"] == pytest.approx(0.025)
+    assert routing_module.preferred_backend("THYAO.IS") == "yahoo"
+
+def test_failing_backend_is_demoted_then_retried_after_decay(clock):
+    for _ in range(3):
+        routing_module.report("yahoo", "bist_stock", None, False)
+    assert routing_module.preferred_backend("THYAO.IS") == "borsapy"
+
+    # Yeni ölçüm gelmeden hata cezası yarılanarak söner
+    clock.t += 3 * config.ROUTING_ERROR_HALF_LIFE
+    assert routing_module.preferred_backend("THYAO.IS") == "yahoo"
+
+def test_ewma_blends_new_samples_with_decayed_errors(clock):
+    alpha = config.ROUTING_EWMA_ALPHA
+    routing_module.report("borsapy", "fx", 0.4, False)
+    clock.t += config.ROUTING_ERROR_HALF_LIFE
+    routing_module.report("borsapy", "fx", 0.2, True)
+
+    entry = routing_module.get_health()[("borsapy", "fx")]
+    assert entry["errors"] == pytest.approx((1 - alpha) * 0.5)
+    assert entry["latency"] == pytest.approx((1 - alpha) * 0.4 + alpha * 0.2)
+    assert entry["samples"] == 2
+
+def test_unroutable_symbols_only_use_yahoo(clock):
+    assert routing_module.rank_backends("AAPL") == ["yahoo"]
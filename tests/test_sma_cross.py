@@ -0,0 +1,11 @@
+import numpy as np
+from backtest_module import crossovers, holding_state
+
+def test_crossovers_signal_through_equality_and_after_warmup():
+    # Önceki barda eşitlik: yukarı geçiş yine sinyal
+    golden, death = crossovers(np.array([1.0, 2.0, 3.0]), np.array([2.0, 2.0, 2.0]))
+    assert golden.tolist() == [False, False, True]
+    assert death.tolist() == [True, False, False]
+    # Isınma bitince hızlı ortalama zaten üstteyse ilk tanımlı barda girilir
+    holding = holding_state(*crossovers(np.array([np.nan, 3.0, 4.0]), np.array([np.nan, 2.0, 3.0])))
+    assert holding.tolist() == [False, True, True]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+import price_store
+import streaming_indicators
+from analysis_module import get_stored_signals, get_universe_signals
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    db = str(tmp_path / "store.db")
+    for module in (price_store, streaming_indicators):
+        monkeypatch.setattr(module, "DB_NAME", db)
+        monkeypatch.setattr(module, "_schema_ready", False)
+
+def _bars(n, seed):
+    rng = np.random.default_rng(seed)
+    close = np.round(100 + rng.normal(0, 1, n).cumsum(), 1) # yuvarlama: eşit kapanışlar (sıfır fark) da olur
+    volume = rng.integers(1, 100, n).astype(float)
+    volume[n // 2] = np.nan
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": volume},
+                        index=pd.bdate_range("2023-01-02", periods=n))
+
+def _wide(symbols):
+    frames = {sym: price_store.load_prices(sym) for sym in symbols}
+    return pd.concat(frames, axis=1, sort=True).swaplevel(0, 1, axis=1)
+
+def test_stored_signals_match_full_history_scoring():
+    symbols = []
+    for k, n in enumerate([30, 120, 260, 600]):
+        bars, sym = _bars(n, k), f"S{k}"
+        symbols.append(sym)
+        price_store.save_prices(sym, bars.iloc[:-3], covered_from="2000-01-01")
+        streaming_indicators.get_latest([sym])
+        # Delta: yeni barlar ve gün içinde revize edilen son bar
+        bars.iloc[-4, bars.columns.get_loc("Close")] += 0.7
+        price_store.save_prices(sym, bars.iloc[-4:])
+
+    stored = get_stored_signals(symbols)
+    full = get_universe_signals(_wide(symbols))
+    for sym in symbols:
+        assert stored[sym]["score"] == full[sym]["score"]
+        assert stored[sym]["rsi"] == pytest.approx(full[sym]["rsi"], nan_ok=True)
+        assert stored[sym]["price"] == price_store.load_prices(sym)["Close"].iloc[-1]
+
+def test_latest_values_follow_rolling_definitions():
+    bars = _bars(300, 9)
+    price_store.save_prices("S", bars, covered_from="2000-01-01")
+    latest = streaming_indicators.get_latest(["S", "MISSING"])
+    assert set(latest) == {"S"}
+
+    close = bars["Close"]
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean().iloc[-1]
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean().iloc[-1]
+    assert latest["S"]["rsi"] == pytest.approx(100 - 100 / (1 + gain / loss))
+    assert latest["S"]["sma200"] == pytest.approx(close.iloc[-200:].mean())
+    assert latest["S"]["volume_mean"] == pytest.approx(bars["Volume"].iloc[-20:].mean())
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+import symbol_resolver
+
+@pytest.fixture
+def listed(tmp_path, monkeypatch):
+    """Temporary symbol map; 'AAA' trades both as a US ticker and as AAA.IS. Records probes."""
+    monkeypatch.setattr(symbol_resolver, "DB_NAME", str(tmp_path / "map.db"))
+    monkeypatch.setattr(symbol_resolver, "_schema_ready", False)
+    probes = []
+
+    def fake_fetch(tickers, period="1y"):
+        probes.append(list(tickers))
+        return {t: pd.DataFrame({"Close": [1.0]}) for t in tickers if t in ("AAA", "AAA.IS")}
+
+    monkeypatch.setattr(symbol_resolver, "fetch_history", fake_fetch)
+    monkeypatch.setattr(symbol_resolver, "get_symbol_history", lambda prices, t: prices.get(t, pd.DataFrame()))
+    monkeypatch.setattr(symbol_resolver, "_listing_for", lambda t: symbol_resolver._guess_listing(t))
+    return probes
+
+def test_market_hint_and_plain_lookup_keep_separate_mappings(listed):
+    assert symbol_resolver.resolve_symbol("AAA")["ticker"] == "AAA"
+    assert symbol_resolver.resolve_symbol("aaa", market="BIST")["ticker"] == "AAA.IS"
+    assert symbol_resolver.to_ticker("AAA", market="BIST") == "AAA.IS"
+    assert symbol_resolver.get_quote_currency("AAA") == "USD"
+    # İkisi de kayıtlı: yeniden deneme yok
+    assert listed == [["AAA"], ["AAA.IS"]]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtest_module import dca_equity
+from optimization_module import run_walk_forward, simulate, prepare_arrays, _combinations, _window
+
+def _prices(n=1200, seed=3):
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.015, n)))
+    return pd.DataFrame({"Close": close}, index=pd.bdate_range("2018-01-01", periods=n))
+
+def _month_starts(index):
+    months = index.month.to_numpy()
+    return int((months[1:] != months[:-1]).sum())
+
+def test_walk_forward_dca_deposits_once_per_month():
+    df = _prices()
+    # Çarpanı hep 1 olan ızgara: yatırılan tutar sadece ay başlarından gelmeli
+    grid = {"dip_multiplier": [1.0], "overbought_rsi": [101], "overbought_multiplier": [1.0]}
+    result = run_walk_forward(df, 'Smart DCA', grid=grid, train_bars=504, test_bars=126,
+                              initial_capital=1000, monthly_dca=100, workers=1)
+
+    oos = df.index[503:] # örnek dışı bölüm + önceki bar (ay geçişi sayımı için)
+    assert result['metrics']['total_invested'] == 1000 + 100 * _month_starts(oos)
+    assert len(result['equity_curve']) == len(df) - 504
+
+FIXED_GRIDS = {
+    'Smart DCA': ({"dip_multiplier": [1.5], "overbought_rsi": [80], "overbought_multiplier": [0.5]}, 100),
+    'RSI Stratejisi (30/70)': ({"rsi_window": [14], "lower": [30], "upper": [70]}, 0),
+    'SMA Cross (50/200)': ({"fast": [50], "slow": [200]}, 0)
+}
+
+@pytest.mark.parametrize("strategy_name", list(FIXED_GRIDS))
+def test_walk_forward_with_fixed_params_matches_one_continuous_run(strategy_name):
+    # Pencere sınırında satış/yeniden alış olmamalı: tek parça çalıştırmayla aynı sonuç
+    df = _prices(n=1400, seed=5)
+    grid, monthly_dca = FIXED_GRIDS[strategy_name]
+    result = run_walk_forward(df, strategy_name, grid=grid, train_bars=504, test_bars=126,
+                              initial_capital=1000, monthly_dca=monthly_dca, workers=1)
+
+    combos = _combinations(strategy_name, grid)
+    arrays = prepare_arrays(df, strategy_name, combos)
+    equity, invested, trades, _ = simulate(_window(arrays, (503, len(df))), strategy_name, combos[0],
+                                           1000, monthly_dca, units=0.0)
+
+    np.testing.assert_allclose(result['equity_curve']['Strategy_Equity'].to_numpy(), equity, rtol=1e-12)
+    assert result['metrics']['trade_count'] == trades
+    assert result['metrics']['total_invested'] == round(invested, 2)
+
+def test_dca_equity_continuing_run_skips_mid_month_deposit():
+    month = np.array([3, 3, 4, 4])
+    price = np.ones(4)
+    multiplier = np.ones(4)
+    _, invested, trades = dca_equity(month, price, multiplier, 1000, 100, 0.0, prev_month=3)
+    assert invested == 1100 # sadece Nisan'ın ilk barında
+    assert trades == 2 # devreden sermaye + Nisan alımı
+    _, invested, trades = dca_equity(month, price, multiplier, 1000, 100, 0.0)
+    assert invested == 1200
+    assert trades == 2